@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Stand-in for the rubocop executable used by the benchmarks.
+
+Reports FAKE_RUBOCOP_OFFENSES offenses (default 10) for every file passed
+on the command line (or via --stdin) after sleeping FAKE_RUBOCOP_LATENCY
+seconds (default 0). Understands --format json, emacs and files as well
+as --list-target-files. With -a and --stdin the trailing whitespace of
+the source gets corrected and the source is printed after the report like
+rubocop does (not for json, only the source with --stderr).
+"""
+import json
+import os
+import sys
+import time
+
+def offenses_for(path, count):
+  offenses = []
+  for i in range(count):
+    offenses.append({
+      'severity': ['convention', 'warning', 'error', 'refactor'][i % 4],
+      'message': 'Style/Fake: Fake offense number {0}: with a colon.'.format(i),
+      'cop_name': 'Style/Fake',
+      'corrected': False,
+      'correctable': i % 2 == 0,
+      'location': {
+        'start_line': i + 1,
+        'start_column': 1,
+        'last_line': i + 1,
+        'last_column': 5,
+        'length': 5,
+        'line': i + 1,
+        'column': 1
+      }
+    })
+  return offenses
+
+def correct(source):
+  return ''.join(line.rstrip() + '\n' for line in source.splitlines())
+
+def target_files(args):
+  files = []
+  for arg in args:
+    if os.path.isdir(arg):
+      for root, dirs, names in os.walk(arg):
+        for name in sorted(names):
+          if name.endswith('.rb'):
+            files.append(os.path.relpath(os.path.join(root, name)))
+    elif os.path.isfile(arg):
+      files.append(arg)
+  return files
+
+def main(args):
+  time.sleep(float(os.environ.get('FAKE_RUBOCOP_LATENCY', '0')))
+  count = int(os.environ.get('FAKE_RUBOCOP_OFFENSES', '10'))
+
+  if '--list-target-files' in args or '-L' in args:
+    for path in target_files(args):
+      print(path)
+    return 0
+
+  fmt = 'progress'
+  if '--format' in args:
+    fmt = args[args.index('--format') + 1]
+  source = None
+  if '--stdin' in args:
+    source = sys.stdin.read()
+    paths = [args[args.index('--stdin') + 1]]
+  else:
+    paths = [arg for arg in args if os.path.isfile(arg)]
+
+  corrected = None
+  if source is not None and ('-a' in args or '--autocorrect' in args):
+    corrected = correct(source)
+  report = sys.stdout
+  if '--stderr' in args:
+    report = sys.stderr
+
+  if fmt == 'json':
+    files = [{'path': path, 'offenses': offenses_for(path, count)} for path in paths]
+    report.write(json.dumps({'files': files}))
+  elif fmt == 'files':
+    for path in paths:
+      report.write(os.path.abspath(path) + '\n')
+  else:
+    for path in paths:
+      for offense in offenses_for(path, count):
+        location = offense['location']
+        report.write('{0}:{1}:{2}: {3}: {4}\n'.format(os.path.abspath(path),
+          location['line'], location['column'],
+          offense['severity'][0].upper(), offense['message']))
+
+  # Integration formatters like json never get the corrected source
+  if corrected is not None and '--stderr' in args:
+    sys.stdout.write(corrected)
+  elif corrected is not None and fmt != 'json':
+    sys.stdout.write('=' * 20 + '\n' + corrected)
+  return 1 if count else 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,105 @@
+import bisect
+import sublime
+
+RUBY_SYNTAX = 'Packages/Ruby/Ruby.sublime-syntax'
+
+class FakeView(object):
+  """In-memory view implementing the parts of the API the plugin uses"""
+  next_id = 1
+
+  def __init__(self, path, text, buffer_id=None):
+    self.view_id = FakeView.next_id
+    FakeView.next_id += 1
+    self.buffer = buffer_id or self.view_id
+    self.path = path
+    self.view_settings = sublime.Settings({'syntax': RUBY_SYNTAX})
+    self.regions = {}
+    self.status = {}
+    self.changes = 1
+    self.set_text(text)
+
+  def set_text(self, text):
+    self.text = text
+    self.line_starts = [0]
+    for i, char in enumerate(text):
+      if char == '\n':
+        self.line_starts.append(i + 1)
+
+  def id(self):
+    return self.view_id
+
+  def buffer_id(self):
+    return self.buffer
+
+  def file_name(self):
+    return self.path
+
+  def settings(self):
+    return self.view_settings
+
+  def window(self):
+    return None
+
+  def is_loading(self):
+    return False
+
+  def is_dirty(self):
+    return False
+
+  def is_read_only(self):
+    return False
+
+  def encoding(self):
+    return 'UTF-8'
+
+  def change_count(self):
+    return self.changes
+
+  def size(self):
+    return len(self.text)
+
+  def substr(self, region):
+    return self.text[region.begin():region.end()]
+
+  def text_point(self, row, col):
+    row = min(max(row, 0), len(self.line_starts) - 1)
+    return min(self.line_starts[row] + col, len(self.text))
+
+  def rowcol(self, point):
+    row = bisect.bisect_right(self.line_starts, point) - 1
+    return row, point - self.line_starts[row]
+
+  def line(self, point):
+    if isinstance(point, sublime.Region):
+      point = point.begin()
+    row, col = self.rowcol(point)
+    begin = self.line_starts[row]
+    if row + 1 < len(self.line_starts):
+      end = self.line_starts[row + 1] - 1
+    else:
+      end = len(self.text)
+    return sublime.Region(begin, end)
+
+  def visible_region(self):
+    return sublime.Region(0, min(len(self.text), 5000))
+
+  def sel(self):
+    return [sublime.Region(0, 0)]
+
+  def add_regions(self, key, regions, scope='', icon='', flags=0):
+    self.regions[key] = list(regions)
+
+  def get_regions(self, key):
+    return list(self.regions.get(key, []))
+
+  def erase_regions(self, key):
+    self.regions.pop(key, None)
+
+  def set_status(self, key, value):
+    self.status[key] = value
+
+  def erase_status(self, key):
+    self.status.pop(key, None)
+
+  def run_command(self, cmd, args=None):
+    pass
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Headless benchmarks of the plugin.
+
+Runs outside of Sublime Text by putting the stub sublime modules on the
+path and importing the package as RuboCop (like Sublime Text does). The
+rubocop executable is replaced by fake_rubocop.py.
+
+  python3 benchmarks/run.py --output results.json
+  python3 benchmarks/run.py --compare results.json
+
+--compare exits with status 1 if a benchmark got slower than the
+baseline by more than --threshold (default 20%).
+"""
+import argparse
+import atexit
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+FAKE_RUBOCOP = os.path.join(BENCH_DIR, 'fake_rubocop.py')
+
+def setup_imports():
+  sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+  sys.path.insert(0, BENCH_DIR)
+  # Sublime Text imports the plugin as a package named after its folder
+  packages = tempfile.mkdtemp(prefix='rubocop-bench-')
+  atexit.register(shutil.rmtree, packages, True)
+  os.symlink(PACKAGE_DIR, os.path.join(packages, 'RuboCop'))
+  sys.path.insert(0, packages)
+
+setup_imports()
+
+import sublime
+from fakes import FakeView
+from RuboCop.constants import FILE_REGEX, SETTINGS_FILE
+from RuboCop.rubocop_runner import RubocopRunner
+from RuboCop.rubocop_results import parse_json
+from RuboCop.rubocop_correction import *
+from RuboCop.rubocop_listener import RubocopEventListener
+
+def measure(func, repeat):
+  """Returns the median and minimum duration of func in seconds"""
+  timings = []
+  for i in range(repeat):
+    started = time.perf_counter()
+    func()
+    timings.append(time.perf_counter() - started)
+  timings.sort()
+  return {'median': timings[len(timings) // 2], 'min': timings[0]}
+
+def fake_runner(**args):
+  options = {
+    'use_rbenv': False,
+    'use_rvm': False,
+    'custom_rubocop_cmd': ' '.join(
+      shlex.quote(part) for part in [sys.executable, FAKE_RUBOCOP]),
+    'on_windows': False,
+    'is_st2': False
+  }
+  options.update(args)
+  return RubocopRunner(options)
+
+def fake_output(fmt, path, offenses):
+  env = dict(os.environ, FAKE_RUBOCOP_OFFENSES=str(offenses))
+  # rubocop exits with 1 if there are offenses, so no check_output()
+  return subprocess.run(
+    [sys.executable, FAKE_RUBOCOP, '--format', fmt, path], env=env,
+    stdout=subprocess.PIPE).stdout
+
+def ruby_source(lines):
+  return ''.join('x_{0} = {0}\n'.format(i) for i in range(lines))
+
+def bench_command_building(args):
+  runners = [
+    fake_runner(),
+    RubocopRunner({'use_rbenv': True, 'use_rvm': False,
+      'custom_rubocop_cmd': '', 'rubocop_config_file': '/tmp/.rubocop.yml',
+      'on_windows': False, 'is_st2': False}),
+    fake_runner(server_mode=True, use_server=True)
+  ]
+  paths = ['/project/lib/file_{0}.rb'.format(i) for i in range(50)]
+  options = ['--format', 'json', '--force-exclusion']
+
+  def build():
+    for i in range(1000):
+      for runner in runners:
+        runner.command_list(paths, options)
+  return measure(build, args.repeat)
+
+def bench_subprocess(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  os.environ['FAKE_RUBOCOP_OFFENSES'] = '10'
+  os.environ['FAKE_RUBOCOP_LATENCY'] = '0'
+
+  def run():
+    runner = fake_runner()
+    runner.run([path], ['--format', 'json'])
+  result = measure(run, args.repeat)
+
+  # Bare interpreter start up, to tell the plugin's overhead apart
+  baseline = measure(
+    lambda: subprocess.call([sys.executable, '-c', 'pass']), args.repeat)
+  result['python_startup'] = baseline['median']
+  return result
+
+def bench_parse_json(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  output = fake_output('json', path, args.offenses)
+  result = measure(lambda: parse_json(output, work_dir), args.repeat)
+  result['bytes'] = len(output)
+  result['mb_per_second'] = len(output) / result['median'] / 1e6
+  return result
+
+def bench_parse_emacs(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  output = fake_output('emacs', path, args.offenses).decode('utf-8')
+  pattern = re.compile(FILE_REGEX)
+
+  def parse():
+    for line in output.splitlines():
+      pattern.match(line)
+  result = measure(parse, args.repeat)
+  result['bytes'] = len(output)
+  result['mb_per_second'] = len(output) / result['median'] / 1e6
+  return result
+
+def bench_marks(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  view = FakeView(path, ruby_source(args.offenses))
+  offenses = parse_json(fake_output('json', path, args.offenses), work_dir)
+  offenses = offenses[path]
+  listener = RubocopEventListener.instance()
+
+  def mark():
+    listener.clear_marks(view)
+    listener.set_marks_by_results(view, offenses)
+  result = measure(mark, args.repeat)
+  result['offenses'] = len(offenses)
+  return result
+
+def bench_offense_lookup(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  view = FakeView(path, ruby_source(args.offenses))
+  offenses = parse_json(fake_output('json', path, args.offenses), work_dir)
+  listener = RubocopEventListener.instance()
+  listener.set_marks_by_results(view, offenses[path])
+  positions = [view.text_point(row, 2) for row in range(0, args.offenses, 7)]
+
+  def lookup():
+    for pos in positions:
+      view.sel = lambda: [sublime.Region(pos, pos)]
+      listener.on_selection_modified(view)
+  result = measure(lookup, args.repeat)
+  result['lookups'] = len(positions)
+  return result
+
+def bench_autocorrect(args, work_dir):
+  path = os.path.join(work_dir, 'file.rb')
+  lines = ruby_source(args.offenses).splitlines(True)
+  # Every other line has trailing whitespace for the fake to correct
+  content = ''.join(line.replace('\n', '  \n') if i % 2 else line
+    for i, line in enumerate(lines))
+  os.environ['FAKE_RUBOCOP_OFFENSES'] = '10'
+  hunks = []
+
+  def correct():
+    runner = fake_runner()
+    output = runner.run([], correction_options(path), content.encode('utf-8'))
+    corrected = corrected_source(output, content)
+    if not runner.succeeded() or corrected is None:
+      raise RuntimeError('rubocop did not print the corrected source')
+    hunks[:] = replacements(content, corrected)
+  result = measure(correct, args.repeat)
+  if len(hunks) != len(lines) // 2:
+    raise RuntimeError('expected {0} corrections, got {1}'.format(
+      len(lines) // 2, len(hunks)))
+  result['hunks'] = len(hunks)
+  return result
+
+def git_commit():
+  try:
+    return subprocess.check_output(
+      ['git', 'rev-parse', 'HEAD'], cwd=PACKAGE_DIR,
+      stderr=subprocess.DEVNULL).decode('utf-8').strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def run_benchmarks(args):
+  sublime.load_settings(SETTINGS_FILE).values.update({
+    'mark_issues_in_view': True,
+    'result_cache_size': 0,
+    'performance_log_size': 0,
+    'max_marked_offenses': 0
+  })
+  RubocopEventListener()
+
+  work_dir = os.path.realpath(tempfile.mkdtemp(prefix='rubocop-bench-work-'))
+  atexit.register(shutil.rmtree, work_dir, True)
+  with open(os.path.join(work_dir, 'file.rb'), 'w') as f:
+    f.write(ruby_source(args.offenses))
+
+  benchmarks = [
+    ('command_building', lambda: bench_command_building(args)),
+    ('subprocess', lambda: bench_subprocess(args, work_dir)),
+    ('parse_json', lambda: bench_parse_json(args, work_dir)),
+    ('parse_emacs', lambda: bench_parse_emacs(args, work_dir)),
+    ('marks', lambda: bench_marks(args, work_dir)),
+    ('offense_lookup', lambda: bench_offense_lookup(args, work_dir)),
+    ('autocorrect', lambda: bench_autocorrect(args, work_dir))
+  ]
+  results = {}
+  for name, func in benchmarks:
+    if args.only and not name in args.only:
+      continue
+    results[name] = func()
+    print('{0:<18} {1:>10.2f}ms (min {2:.2f}ms)'.format(
+      name, results[name]['median'] * 1000, results[name]['min'] * 1000))
+
+  return {
+    'commit': git_commit(),
+    'python': sys.version.split()[0],
+    'platform': sys.platform,
+    'offenses': args.offenses,
+    'repeat': args.repeat,
+    'created': time.time(),
+    'results': results
+  }
+
+def compare(report, baseline, threshold):
+  """Prints the changes against baseline and returns the names of the
+  benchmarks that got slower by more than threshold"""
+  print('')
+  print('Compared to {0}:'.format(baseline.get('commit') or 'baseline'))
+  regressions = []
+  for name, result in sorted(report['results'].items()):
+    before = baseline.get('results', {}).get(name)
+    if not before:
+      continue
+    ratio = result['median'] / before['median']
+    flag = ''
+    if ratio > 1 + threshold:
+      flag = '  REGRESSION'
+      regressions.append(name)
+    print('{0:<18} {1:>10.2f}ms -> {2:>10.2f}ms ({3:+.0f}%){4}'.format(
+      name, before['median'] * 1000, result['median'] * 1000,
+      (ratio - 1) * 100, flag))
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmarks of the RuboCop plugin')
+  parser.add_argument('--offenses', type=int, default=12000,
+    help='number of offenses of the benchmarked file')
+  parser.add_argument('--repeat', type=int, default=5)
+  parser.add_argument('--only', nargs='*', help='names of the benchmarks to run')
+  parser.add_argument('--output', help='write the results as JSON to this file')
+  parser.add_argument('--compare', help='JSON results of an earlier run')
+  parser.add_argument('--threshold', type=float, default=0.2)
+  args = parser.parse_args()
+
+  report = run_benchmarks(args)
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  if args.compare:
+    with open(args.compare) as f:
+      baseline = json.load(f)
+    if compare(report, baseline, args.threshold):
+      return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
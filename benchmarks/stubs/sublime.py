@@ -0,0 +1,129 @@
+# Minimal stand-in for Sublime Text's sublime module, just enough to
+# import and drive the plugin outside of the editor.
+
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+PERSISTENT = 16
+HIDDEN = 128
+ENCODED_POSITION = 1
+DRAW_OUTLINED = DRAW_NO_FILL
+
+_settings = {}
+_windows = []
+
+def version():
+  return '3211'
+
+def platform():
+  return 'linux'
+
+def arch():
+  return 'x64'
+
+def cache_path():
+  import tempfile
+  return tempfile.gettempdir()
+
+def packages_path():
+  import tempfile
+  return tempfile.gettempdir()
+
+def load_settings(name):
+  if not name in _settings:
+    _settings[name] = Settings()
+  return _settings[name]
+
+def save_settings(name):
+  pass
+
+def set_timeout(callback, delay=0):
+  callback()
+
+def set_timeout_async(callback, delay=0):
+  if not delay:
+    callback()
+    return
+  import threading
+  timer = threading.Timer(delay / 1000.0, callback)
+  timer.daemon = True
+  timer.start()
+
+def windows():
+  return list(_windows)
+
+def active_window():
+  return _windows[0] if _windows else None
+
+def status_message(msg):
+  pass
+
+def message_dialog(msg):
+  pass
+
+def error_message(msg):
+  pass
+
+def ok_cancel_dialog(msg, ok_title=''):
+  return True
+
+class Settings(object):
+  def __init__(self, values=None):
+    self.values = dict(values or {})
+    self.callbacks = {}
+
+  def get(self, name, default=None):
+    return self.values.get(name, default)
+
+  def set(self, name, value):
+    self.values[name] = value
+    for callback in list(self.callbacks.values()):
+      callback()
+
+  def has(self, name):
+    return name in self.values
+
+  def erase(self, name):
+    self.values.pop(name, None)
+
+  def add_on_change(self, key, callback):
+    self.callbacks[key] = callback
+
+  def clear_on_change(self, key):
+    self.callbacks.pop(key, None)
+
+class Region(object):
+  __slots__ = ('a', 'b')
+
+  def __init__(self, a, b=None):
+    self.a = a
+    self.b = a if b is None else b
+
+  def begin(self):
+    return min(self.a, self.b)
+
+  def end(self):
+    return max(self.a, self.b)
+
+  def size(self):
+    return abs(self.b - self.a)
+
+  def empty(self):
+    return self.a == self.b
+
+  def contains(self, x):
+    return self.begin() <= x <= self.end()
+
+  def intersects(self, other):
+    return self.begin() < other.end() and other.begin() < self.end()
+
+  def __eq__(self, other):
+    return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+  def __repr__(self):
+    return 'Region({0}, {1})'.format(self.a, self.b)
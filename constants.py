@@ -2,6 +2,16 @@ import sublime
 
 REGIONS_ID = 'rubocop_remark_regions'
 SETTINGS_FILE = 'RuboCop.sublime-settings'
+OUTPUT_PANEL_NAME = 'rubocop'
+FILE_REGEX = r"^(.*):(\d*):(\d*): (.: .*$)"
+# Severities which get their own regions, see mark_styles in the settings
+MARK_SEVERITIES = ['convention', 'warning', 'error', 'fatal']
+DEFAULT_MARK_SCOPES = {
+  'convention': 'keyword',
+  'warning': 'markup.warning',
+  'error': 'markup.error',
+  'fatal': 'invalid'
+}
 REGIONS_OPTIONS_BITS = (sublime.DRAW_EMPTY |
                        sublime.DRAW_OUTLINED |
                        sublime.HIDE_ON_MINIMAP)
@@ -15,6 +15,8 @@ else:
     'RSpec.tmLanguage'
   ]
 
+PROJECT_ROOT_MARKERS = ['.rubocop.yml', 'Gemfile', 'gems.rb']
+
 class FileTools(object):
   """Simple file operations"""
 
@@ -41,3 +43,27 @@ class FileTools(object):
         return True
 
     return False
+
+  @staticmethod
+  def file_state(path):
+    """Returns (mtime, size) of path or None if it does not exist"""
+    try:
+      st = os.stat(path)
+    except OSError:
+      return None
+    return (st.st_mtime, st.st_size)
+
+  @staticmethod
+  def project_root(path):
+    """Returns the nearest folder above path which looks like a
+    project root (contains a RuboCop config or a Gemfile)"""
+    folder = os.path.dirname(path) if os.path.isfile(path) else path
+    current = folder
+    while True:
+      for marker in PROJECT_ROOT_MARKERS:
+        if os.path.exists(os.path.join(current, marker)):
+          return current
+      parent = os.path.dirname(current)
+      if parent == current:
+        return folder
+      current = parent
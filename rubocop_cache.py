@@ -0,0 +1,237 @@
+import os
+import re
+import hashlib
+import threading
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
+
+CONFIG_FILE_NAME = '.rubocop.yml'
+# inherit_from either lists its files inline or as the items below it
+INHERIT_FROM = re.compile(r'^inherit_from:\s*(.*)$')
+INHERIT_ITEM = re.compile(r'^\s+-\s*(.+)$')
+REMOTE_CONFIG = re.compile(r'^https?://')
+# The cache folder gets pruned whenever this fraction of max_entries got
+# written since the last pruning
+PRUNE_FRACTION = 10
+
+class ResultCache(object):
+  """Keeps rubocop results addressed by file content and configuration.
+  Entries get evicted in least recently used order and can optionally be
+  stored inside a cache directory to survive restarts."""
+  cache_instance = None
+  # config file -> ((mtime, size), inherited files)
+  inherited = {}
+
+  def __init__(self, max_entries=200, cache_dir=None):
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+    self.max_entries = max_entries
+    self.cache_dir = None
+    self.writes = 0
+    self.configure(max_entries, cache_dir)
+
+  @classmethod
+  def instance(cls):
+    if cls.cache_instance is None:
+      cls.cache_instance = cls()
+    return cls.cache_instance
+
+  def configure(self, max_entries, cache_dir):
+    with self.lock:
+      self.max_entries = max_entries
+      if cache_dir != self.cache_dir:
+        self.cache_dir = cache_dir
+        if cache_dir:
+          self.prune_cache_dir()
+      self.evict()
+
+  def enabled(self):
+    return self.max_entries > 0
+
+  @staticmethod
+  def fingerprint(call_list, path, config_file=None, version=None):
+    """Describes everything besides the file content which has an effect
+    on the rubocop result: the command, its rubocop version, the path and
+    the config files including the ones they inherit from."""
+    parts = list(call_list)
+    parts.append(path or '')
+    parts.append(version or '')
+    parts += ResultCache.config_states(
+      [config_file, ResultCache.nearest_config(path)])
+    return '\x00'.join(parts)
+
+  @staticmethod
+  def config_states(config_files):
+    """Returns the state (path, mtime and size) of the given config files
+    and of all local files they inherit from"""
+    states = []
+    for cfg in ResultCache.config_chain(config_files):
+      try:
+        st = os.stat(cfg)
+        states.append('{0}:{1}:{2}'.format(cfg, st.st_mtime, st.st_size))
+      except OSError:
+        states.append(cfg)
+    return states
+
+  @staticmethod
+  def config_chain(config_files):
+    chain = []
+    pending = [cfg for cfg in config_files if cfg]
+    while pending:
+      cfg = os.path.abspath(pending.pop(0))
+      if cfg in chain or not os.path.isfile(cfg):
+        continue
+      chain.append(cfg)
+      pending += ResultCache.inherited_files(cfg)
+    return chain
+
+  @staticmethod
+  def inherited_files(cfg):
+    """Local files of the inherit_from entry of cfg (like the
+    .rubocop_todo.yml written by --auto-gen-config). Remote ones are
+    left out."""
+    try:
+      st = os.stat(cfg)
+    except OSError:
+      return []
+    state = (st.st_mtime, st.st_size)
+    cached = ResultCache.inherited.get(cfg)
+    if cached and cached[0] == state:
+      return cached[1]
+    try:
+      with open(cfg, 'rb') as f:
+        lines = f.read().decode('utf-8', 'replace').splitlines()
+    except (IOError, OSError):
+      return []
+
+    values = []
+    in_list = False
+    for line in lines:
+      if in_list:
+        match = INHERIT_ITEM.match(line)
+        if match:
+          values.append(match.group(1))
+          continue
+        if not line.strip() or line.lstrip().startswith('#'):
+          continue
+        in_list = False
+      match = INHERIT_FROM.match(line)
+      if match:
+        value = match.group(1).split(' #')[0].strip()
+        if value:
+          values += value.strip('[]').split(',')
+        else:
+          in_list = True
+
+    folder = os.path.dirname(cfg)
+    files = []
+    for value in values:
+      value = value.split(' #')[0].strip().strip('\'"')
+      if value and not REMOTE_CONFIG.match(value):
+        files.append(os.path.join(folder, value))
+    ResultCache.inherited[cfg] = (state, files)
+    return files
+
+  @staticmethod
+  def nearest_config(path):
+    if not path:
+      return None
+    current = os.path.dirname(os.path.abspath(path))
+    while True:
+      candidate = os.path.join(current, CONFIG_FILE_NAME)
+      if os.path.isfile(candidate):
+        return candidate
+      parent = os.path.dirname(current)
+      if parent == current:
+        return None
+      current = parent
+
+  @staticmethod
+  def key(content, fingerprint):
+    digest = hashlib.sha1(content)
+    digest.update(fingerprint.encode('utf-8'))
+    return digest.hexdigest()
+
+  def get(self, key):
+    with self.lock:
+      if key in self.entries:
+        value = self.entries.pop(key)
+        self.entries[key] = value
+        return value
+    value = self.read_entry(key)
+    if value is not None:
+      self.put(key, value, False)
+    return value
+
+  def put(self, key, value, persist=True):
+    if not self.enabled():
+      return
+    with self.lock:
+      self.entries.pop(key, None)
+      self.entries[key] = value
+      self.evict()
+    if persist:
+      self.write_entry(key, value)
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+
+  def evict(self):
+    while len(self.entries) > max(self.max_entries, 0):
+      self.entries.popitem(last=False)
+
+  def entry_path(self, key):
+    return os.path.join(self.cache_dir, key)
+
+  def read_entry(self, key):
+    if not self.cache_dir:
+      return None
+    try:
+      with open(self.entry_path(key), 'rb') as f:
+        return f.read()
+    except (IOError, OSError):
+      return None
+
+  def write_entry(self, key, value):
+    if not self.cache_dir:
+      return
+    try:
+      if not os.path.isdir(self.cache_dir):
+        os.makedirs(self.cache_dir)
+      tmp_path = self.entry_path(key) + '.tmp'
+      with open(tmp_path, 'wb') as f:
+        f.write(value)
+      os.rename(tmp_path, self.entry_path(key))
+    except (IOError, OSError):
+      return
+    # Prune from time to time, so the folder does not grow during a
+    # long session
+    with self.lock:
+      self.writes += 1
+      if self.writes >= max(self.max_entries // PRUNE_FRACTION, 1):
+        self.writes = 0
+        self.prune_cache_dir()
+
+  def prune_cache_dir(self):
+    # Keep only the most recently written entries on disk
+    if not self.cache_dir or not os.path.isdir(self.cache_dir):
+      return
+    paths = [os.path.join(self.cache_dir, name)
+      for name in os.listdir(self.cache_dir)]
+    paths.sort(key=modification_time, reverse=True)
+    for path in paths[max(self.max_entries, 0):]:
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+
+def modification_time(path):
+  # Entries might get replaced while the folder is pruned
+  try:
+    return os.path.getmtime(path)
+  except OSError:
+    return 0
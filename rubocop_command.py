@@ -1,41 +1,54 @@
 import sublime_plugin
 import sublime
 import os
-import locale
+import time
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
 
 if sublime.version() >= '3000':
   from RuboCop.file_tools import FileTools
-  from RuboCop.rubocop_runner import RubocopRunner
+  from RuboCop.rubocop_config import RubocopConfig
   from RuboCop.constants import *
   from RuboCop.rubocop_listener import RubocopEventListener
+  from RuboCop.rubocop_parallel import *
+  from RuboCop.rubocop_file_index import FileIndex
+  from RuboCop.rubocop_results import *
+  from RuboCop.rubocop_correction import *
+  from RuboCop.rubocop_environment import EnvironmentResolver
+  from RuboCop.rubocop_stats import RunStats
+  from RuboCop.rubocop_prewarm import CachePrewarmer
+  from RuboCop.rubocop_project_results import ProjectResults, GROUPINGS
 else:
   from file_tools import FileTools
-  from rubocop_runner import RubocopRunner
+  from rubocop_config import RubocopConfig
   from constants import *
   from rubocop_listener import RubocopEventListener
+  from rubocop_parallel import *
+  from rubocop_file_index import FileIndex
+  from rubocop_results import *
+  from rubocop_correction import *
+  from rubocop_environment import EnvironmentResolver
+  from rubocop_stats import RunStats
+  from rubocop_prewarm import CachePrewarmer
+  from rubocop_project_results import ProjectResults, GROUPINGS
 
 # Base class for all RuboCop commands
 class RubocopCommand(sublime_plugin.TextCommand):
+  # window id -> running parallel checks, a new check of a window only
+  # replaces the checks of that window
+  parallel_checks = {}
+
   def run(self, edit):
     self.load_config()
 
   def load_config(self):
-    s = sublime.load_settings(SETTINGS_FILE)
-    cfg_file = s.get('rubocop_config_file')
-    if cfg_file:
-      cfg_file = FileTools.quote(cfg_file)
-    self.runner = RubocopRunner(
-      {
-        'use_rbenv': s.get('check_for_rbenv'),
-        'use_rvm': s.get('check_for_rvm'),
-        'custom_rubocop_cmd': s.get('rubocop_command'),
-        'rvm_auto_ruby_path': s.get('rvm_auto_ruby_path'),
-        'rbenv_path': s.get('rbenv_path'),
-        'on_windows': self.on_windows(),
-        'rubocop_config_file': cfg_file,
-        'is_st2': self.is_st2()
-      }
-    )
+    self.config = RubocopConfig.for_view(self.view)
+    # Commands run on the UI thread, background runs resolve the
+    # Ruby environment themselves.
+    self.runner = self.config.create_runner(resolve=False)
 
   def on_windows(self):
     return sublime.platform() == 'windows'
@@ -89,9 +102,252 @@ class RubocopCommand(sublime_plugin.TextCommand):
       'cmd': command,
       'shell': True,
       'working_dir': working_dir,
-      'file_regex': r"^(.*):(\d*):(\d*): (.: .*$)"
+      'file_regex': FILE_REGEX
     })
 
+  def project_folders(self):
+    return self.view.window().folders()
+
+  def root_runner(self, root):
+    # Every root is checked in its own working directory, which makes
+    # rubocop pick up its config and lets the Ruby environment of the
+    # root get resolved.
+    runner = self.runner.clone()
+    runner.chdir = root
+    runner.cache_root = self.config.rubocop_cache_root(root)
+    return runner
+
+  def root_processes(self, roots):
+    processes = self.config.get('project_check_processes') or default_process_count()
+    return max(processes // len(roots), 1)
+
+  def window_id(self):
+    window = self.view.window()
+    return window.id() if window else None
+
+  def cancel_parallel_checks(self):
+    self.checks_window_id = self.window_id()
+    checks = RubocopCommand.parallel_checks.pop(self.checks_window_id, [])
+    for check in checks:
+      check.cancel()
+    self.check_errors = []
+
+  def start_check(self, check):
+    RubocopCommand.parallel_checks.setdefault(self.checks_window_id, []).append(check)
+    check.start()
+
+  def finish_check(self, check):
+    checks = RubocopCommand.parallel_checks.get(self.checks_window_id, [])
+    if check in checks:
+      checks.remove(check)
+
+  def run_parallel_check(self, folders):
+    """Checks all folders at the same time and shows the offenses in the
+    output panel as they arrive"""
+    self.cancel_parallel_checks()
+
+    window = self.view.window()
+    panel = self.create_output_panel(window, folders[0])
+    self.offense_count = 0
+    if self.shares_results(self.used_options()):
+      # The results can be reused by the in-view checks
+      check_class = CollectingCheck
+      options = ['--format', 'json', '--force-exclusion']
+    else:
+      check_class = ParallelCheck
+      options = ['--format', 'emacs', '--force-exclusion'] + self.used_options()
+
+    processes = self.root_processes(folders)
+    started = time.time()
+    root_results = RootResults(folders,
+      lambda results: self.finish_parallel_check(panel, results, time.time() - started))
+    self.append_to_panel(panel, 'RuboCop: Checking {0} with {1} processes each...\n'.format(
+      ', '.join(folders), processes))
+    for root in folders:
+      self.start_parallel_check(panel, check_class, root, options, processes, root_results)
+
+  def start_parallel_check(self, panel, check_class, root, options, processes, root_results):
+    check = check_class(
+      self.root_runner(root),
+      [root],
+      options,
+      processes,
+      lambda lines: sublime.set_timeout(
+        lambda: self.append_shard_output(panel, lines), 0),
+      lambda file_count, elapsed: sublime.set_timeout(
+        lambda: self.finish_root_check(check, root_results, file_count, elapsed), 0)
+    )
+    self.start_check(check)
+
+  def finish_root_check(self, check, root_results, file_count, elapsed):
+    self.finish_check(check)
+    self.add_check_errors(check)
+    results = getattr(check, 'results', {})
+    if isinstance(check, CollectingCheck) and not check.errors:
+      self.share_results(results, check.states, check.pathlist[0])
+    root_results.add(check.pathlist[0], results, file_count, elapsed)
+
+  def add_check_errors(self, check):
+    # Incomplete results are neither shared nor kept for the summaries
+    for message in check.errors:
+      self.check_errors.append((check.pathlist[0], message))
+
+  def error_lines(self):
+    lines = []
+    for root, message in self.check_errors:
+      lines.append('RuboCop failed on {0}:'.format(root))
+      lines += ['  ' + line for line in message.splitlines()]
+    return lines
+
+  def finish_parallel_check(self, panel, root_results, elapsed):
+    file_count = sum(checked for root, results, checked, root_elapsed in root_results)
+    lines = [
+      '',
+      'RuboCop: {0} files inspected, {1} offenses detected in {2:.2f}s.'.format(
+        file_count, self.offense_count, elapsed)
+    ]
+    lines += self.root_timings(root_results)
+    lines += self.error_lines()
+    self.append_to_panel(panel, '\n'.join(lines) + '\n')
+
+  def root_timings(self, root_results):
+    if len(root_results) < 2:
+      return []
+    return [
+      '  {0}: {1} files in {2:.2f}s'.format(root, checked, elapsed)
+      for root, results, checked, elapsed in root_results
+    ]
+
+  def run_incremental_check(self, folders, options, on_results):
+    """Checks the files of folders which changed since the last run and
+    calls on_results with (root, results, checked, elapsed) tuples
+    holding the offenses of all files of each folder"""
+    self.cancel_parallel_checks()
+
+    share = self.shares_results(options)
+    options = ['--format', 'json', '--force-exclusion'] + options
+    processes = self.root_processes(folders)
+    root_results = RootResults(folders, on_results)
+    for root in folders:
+      self.start_incremental_check(root, options, processes, root_results, share)
+    sublime.status_message('RuboCop: Checking {0}...'.format(', '.join(folders)))
+
+  def start_incremental_check(self, root, options, processes, root_results, share):
+    runner = self.root_runner(root)
+    command = ' '.join(runner.command_list([], options))
+    index_path = os.path.join(sublime.cache_path(), 'RuboCop', 'index',
+      FileIndex.file_name(root, command))
+
+    check = IncrementalCheck(
+      runner,
+      [root],
+      options,
+      processes,
+      FileIndex.open(index_path),
+      lambda results, checked, elapsed: sublime.set_timeout(
+        lambda: self.finish_incremental_check(check, root_results, results, checked, elapsed, share), 0)
+    )
+    self.start_check(check)
+
+  def finish_incremental_check(self, check, root_results, results, checked, elapsed, share):
+    self.finish_check(check)
+    self.add_check_errors(check)
+    if share and not check.errors:
+      self.share_results(results, check.states, check.pathlist[0])
+    root_results.add(check.pathlist[0], results, checked, elapsed)
+
+  def shares_results(self, cop_options):
+    # Only results of the cops used by the in-view checks are of any use
+    # for the views
+    return self.is_st3() and not cop_options
+
+  def share_results(self, results, states, folder=None):
+    # Results of a complete run of folder also feed the summaries. states
+    # hold the (mtime, size) of the files when rubocop inspected them.
+    if folder:
+      ProjectResults.instance().load(folder, results)
+    config = self.config
+    sublime.set_timeout_async(
+      lambda: RubocopEventListener.instance().apply_project_results(results, states, config), 0)
+
+  def incremental_check_enabled(self):
+    return self.is_st3() and self.config.get('incremental_project_check')
+
+  def create_output_panel(self, window, base_dir):
+    if self.is_st3():
+      panel = window.create_output_panel(OUTPUT_PANEL_NAME)
+    else:
+      panel = window.get_output_panel(OUTPUT_PANEL_NAME)
+    panel.settings().set('result_file_regex', FILE_REGEX)
+    panel.settings().set('result_base_dir', base_dir)
+    window.run_command('show_panel', {'panel': 'output.' + OUTPUT_PANEL_NAME})
+    return panel
+
+  def append_to_panel(self, panel, text):
+    panel.run_command('append', {
+      'characters': text,
+      'force': True,
+      'scroll_to_end': True
+    })
+
+  def append_shard_output(self, panel, lines):
+    lines = [line.decode('utf-8', 'replace') for line in lines if line.strip()]
+    self.offense_count += len(lines)
+    if lines:
+      self.append_to_panel(panel, '\n'.join(lines) + '\n')
+
+  def project_results(self, folders, on_results):
+    """Calls on_results with (root, results, checked, elapsed) tuples
+    holding the offenses of all files of each folder. They are taken from
+    memory if a folder was checked before, otherwise the remaining
+    folders get checked once with the default cops."""
+    self.check_errors = []
+    known = {}
+    missing = []
+    for root in folders:
+      results = ProjectResults.instance().results(root)
+      if results is None:
+        missing.append(root)
+      else:
+        known[root] = (root, results, 0, 0.0)
+
+    def merge(root_results):
+      for entry in root_results:
+        known[entry[0]] = entry
+      if self.check_errors:
+        root, message = self.check_errors[0]
+        sublime.status_message('RuboCop failed on {0}: {1}'.format(
+          root, message.splitlines()[0]))
+      on_results([known[root] for root in folders])
+
+    if not missing:
+      merge([])
+    elif self.incremental_check_enabled():
+      self.run_incremental_check(missing, [], merge)
+    else:
+      self.run_collecting_check(missing, merge)
+
+  def run_collecting_check(self, folders, on_results):
+    self.cancel_parallel_checks()
+
+    processes = self.root_processes(folders)
+    root_results = RootResults(folders, on_results)
+    for root in folders:
+      self.start_collecting_check(root, processes, root_results)
+    sublime.status_message('RuboCop: Checking {0}...'.format(', '.join(folders)))
+
+  def start_collecting_check(self, root, processes, root_results):
+    check = CollectingCheck(
+      self.root_runner(root),
+      [root],
+      ['--format', 'json', '--force-exclusion'],
+      processes,
+      lambda lines: None,
+      lambda file_count, elapsed: sublime.set_timeout(
+        lambda: self.finish_root_check(check, root_results, file_count, elapsed), 0)
+    )
+    self.start_check(check)
+
 # --------- General rubocop commands -------------
 
 # Toggles mark_issues_in_view setting
@@ -107,6 +363,71 @@ class RubocopPauseToggleCommand(RubocopCommand):
     sublime.save_settings(SETTINGS_FILE)
     RubocopEventListener.instance().update_marks()
 
+# Shows how rubocop gets started for the current file
+class RubocopShowEnvironmentCommand(RubocopCommand):
+  def run(self, edit):
+    super(RubocopShowEnvironmentCommand, self).run(edit)
+    path = self.view.file_name()
+    root = FileTools.project_root(path) if path else self.current_project_folder()
+    window = self.view.window()
+    sublime.set_timeout_async(lambda: self.show_environment(window, root), 0)
+
+  def show_environment(self, window, root):
+    lines = ['Project root: {0}'.format(root)]
+    if self.runner.custom_rubocop_cmd:
+      lines.append('Custom command: {0}'.format(self.runner.custom_rubocop_cmd))
+    else:
+      # Resolve again, e.g. after rubocop was installed for a new Ruby
+      EnvironmentResolver.instance().invalidate()
+      environment = EnvironmentResolver.instance().resolve(self.runner, root)
+      if environment.command:
+        lines.append('Resolved command: {0}'.format(' '.join(environment.command)))
+        for key in sorted(environment.env.keys()):
+          lines.append('  {0}={1}'.format(key, environment.env[key]))
+      else:
+        lines.append('Resolving failed, using the version manager instead.')
+    self.runner.chdir = root
+    lines.append('Command line: {0}'.format(self.runner.command_string(['<path>'])))
+    panel = self.create_output_panel(window, root)
+    self.append_to_panel(panel, '\n'.join(lines) + '\n')
+
+# Shows percentiles of the timings of the latest in-view checks
+class RubocopPerformanceReportCommand(RubocopCommand):
+  def run(self, edit):
+    super(RubocopPerformanceReportCommand, self).run(edit)
+    window = self.view.window()
+    panel = self.create_output_panel(window, '')
+    self.append_to_panel(panel, '\n'.join(RunStats.instance().report()) + '\n')
+
+# Saves the timings of the latest in-view checks as JSON file
+class RubocopDumpPerformanceDataCommand(RubocopCommand):
+  def run(self, edit):
+    super(RubocopDumpPerformanceDataCommand, self).run(edit)
+    window = self.view.window()
+    default_path = os.path.join(os.path.expanduser('~'), 'rubocop-performance.json')
+    window.show_input_panel('Save RuboCop performance data to:', default_path,
+      lambda path: self.dump(window, path), None, None)
+
+  def dump(self, window, path):
+    try:
+      RunStats.instance().dump(path)
+    except (IOError, OSError) as e:
+      sublime.error_message('RuboCop: Unable to write {0}: {1}'.format(path, e))
+      return
+    window.open_file(path)
+
+# Stops the background prewarming of rubocop's cache
+class RubocopStopCachePrewarmingCommand(RubocopCommand):
+  def run(self, edit):
+    super(RubocopStopCachePrewarmingCommand, self).run(edit)
+    roots = CachePrewarmer.instance().running()
+    CachePrewarmer.instance().cancel()
+    if roots:
+      sublime.status_message('RuboCop: Stopped prewarming the cache of {0}.'.format(
+        ', '.join(roots)))
+    else:
+      sublime.status_message('RuboCop: No cache is being prewarmed.')
+
 # Calling autocorrect on the current file
 class RubocopAutoCorrectCommand(RubocopCommand):
   def run(self, edit):
@@ -124,6 +445,10 @@ class RubocopAutoCorrectCommand(RubocopCommand):
       sublime.message_dialog('RuboCop: Unable to run auto correction on a read only buffer.')
       return
 
+    if self.is_st3() and self.config.get('auto_correct_in_buffer'):
+      self.correct_buffer()
+      return
+
     # Inform user about unsaved contents of current buffer
     if view.is_dirty():
       warn_msg = 'RuboCop: The curent buffer is modified. Save the file and continue?'
@@ -143,9 +468,57 @@ class RubocopAutoCorrectCommand(RubocopCommand):
 
     sublime.status_message('RuboCop: Auto correction done.')
 
+  def correct_buffer(self):
+    # Sends the buffer through rubocop and only applies the changed lines,
+    # which keeps the undo history and does not touch the file on disk.
+    # The correction has a key of its own, so checks of the buffer can not
+    # cancel it.
+    view = self.view
+    change_count = view.change_count()
+    content = view.substr(sublime.Region(0, view.size()))
+    RubocopEventListener.instance().scheduler().submit(
+      ('correct', view.buffer_id()),
+      lambda job: self.correct_content(view, content, change_count, job),
+      1
+    )
+
+  def correct_content(self, view, content, change_count, job):
+    listener = RubocopEventListener.instance()
+    path = view.file_name()
+    runner = self.config.create_runner()
+    runner.timeout = self.config.get('check_timeout', 0)
+    job.attach(runner)
+    output = listener.execute(runner, self.config, [], correction_options(path),
+      content.encode('utf-8'))
+    if listener.run_aborted(runner, view):
+      if runner.cancelled:
+        sublime.status_message('RuboCop: Auto correction cancelled.')
+      return
+    corrected = corrected_source(output, content)
+    if not runner.succeeded() or corrected is None:
+      sublime.status_message('RuboCop: Auto correction failed.')
+      return
+    # The report of the remaining offenses went to stderr
+    offenses = parse_emacs(runner.errors, corrected)
+    hunks = replacements(content, corrected)
+    sublime.set_timeout(
+      lambda: self.apply_corrections(view, change_count, hunks, offenses), 0)
+
+  def apply_corrections(self, view, change_count, hunks, offenses):
+    if view.change_count() != change_count:
+      sublime.status_message('RuboCop: Buffer was modified, auto correction dropped.')
+      return
+    if hunks:
+      view.run_command('rubocop_apply_corrections', {'hunks': hunks})
+    listener = RubocopEventListener.instance()
+    if self.config.get('mark_issues_in_view'):
+      listener.set_marks_for_views([view], offenses)
+    else:
+      listener.clear_marks(view)
+    sublime.status_message('RuboCop: Auto correction done.')
+
   def user_wants_to_cancel(self):
-    s = sublime.load_settings(SETTINGS_FILE)
-    show_warning = s.get('show_auto_correct_warning')
+    show_warning = self.config.get('show_auto_correct_warning')
     if not show_warning:
       return False
 
@@ -170,6 +543,13 @@ Do you want to continue?
       return f.read()
     return f.read().decode(view.encoding())
 
+# Applies the replacements computed by the auto correction as a single
+# undoable edit
+class RubocopApplyCorrectionsCommand(sublime_plugin.TextCommand):
+  def run(self, edit, hunks):
+    for begin, end, text in hunks:
+      self.view.replace(edit, sublime.Region(begin, end), text)
+
 # Runs a check on the currently opened file.
 class RubocopCheckSingleFileCommand(RubocopCommand):
   def run(self, edit):
@@ -181,11 +561,48 @@ class RubocopCheckSingleFileCommand(RubocopCommand):
 class RubocopCheckProjectCommand(RubocopCommand):
   def run(self, edit):
     super(RubocopCheckProjectCommand, self).run(edit)
-    folders = self.view.window().folders()
-    if len(folders) > 0:
-      self.run_rubocop_on([folders[0]])
-    else:
+    folders = self.project_folders()
+    if len(folders) <= 0:
       sublime.status_message('RuboCop: No project folder available.')
+    elif self.incremental_check_enabled():
+      self.run_incremental_check(folders, self.cop_options(), self.show_results)
+    elif self.is_st3() and self.check_in_parallel():
+      self.run_parallel_check(folders)
+    else:
+      self.run_rubocop_on(folders)
+
+  def check_in_parallel(self):
+    return True
+
+  def cop_options(self):
+    # Options which select the cops, without any formatter
+    return self.used_options()
+
+  def show_results(self, root_results):
+    panel = self.create_output_panel(self.view.window(), root_results[0][0])
+    lines = []
+    offense_count = 0
+    file_count = 0
+    changed_count = 0
+    timings = []
+    for root, results, checked, elapsed in root_results:
+      file_count += len(results)
+      changed_count += checked
+      for path, offenses in results.items():
+        offense_count += len(offenses)
+        for offense in offenses:
+          lines.append(format_emacs(path, offense))
+      timings.append('  {0}: {1} files ({2} changed) in {3:.2f}s'.format(
+        root, len(results), checked, elapsed))
+    lines.append('')
+    lines.append(
+      'RuboCop: {0} files inspected ({1} changed), {2} offenses detected in {3:.2f}s.'.format(
+        file_count, changed_count, offense_count,
+        max(entry[3] for entry in root_results)))
+    if len(root_results) > 1:
+      lines += timings
+    lines += self.error_lines()
+    self.append_to_panel(panel, '\n'.join(lines) + '\n')
 
 # Runs a check on the folder of the current file.
 class RubocopCheckFileFolderCommand(RubocopCommand):
@@ -200,16 +617,64 @@ class RubocopCheckOpenFilesCommand(RubocopCommand):
   def run(self, edit):
     super(RubocopCheckOpenFilesCommand, self).run(edit)
     files = self.open_ruby_files()
-    if len(files) > 0:
-      self.run_rubocop_on(files)
-    else:
+    if len(files) == 0:
       sublime.status_message('RuboCop: There are no Ruby files to check.')
+    elif self.is_st3():
+      window = self.view.window()
+      folder = self.current_project_folder()
+      panel = self.create_output_panel(window, folder)
+      # Goes through the scheduler like the in-view checks, so it neither
+      # blocks them nor runs without a timeout
+      RubocopEventListener.instance().scheduler().submit('check_open_files',
+        lambda job: self.check_files(panel, files, job), 1)
+    else:
+      self.run_rubocop_on(files)
+
+  def check_files(self, panel, files, job):
+    # Runs through the plugin's runner, so the in-view checks can take
+    # over the results
+    runner = self.config.create_runner()
+    runner.timeout = self.config.get('check_timeout', 0)
+    options = ['--format', 'json', '--force-exclusion'] + self.used_options()
+    states = dict((normalize_path(path), FileTools.file_state(path)) for path in files)
+    results = OrderedDict()
+    for part in command_chunks(runner, options, files):
+      part_runner = runner.clone()
+      job.attach(part_runner)
+      output = part_runner.run(part, options)
+      if part_runner.cancelled:
+        return
+      if part_runner.timed_out:
+        sublime.set_timeout(lambda: self.append_to_panel(panel,
+          'RuboCop: Check of the open files timed out.\n'), 0)
+        return
+      part_results = parse_json(output, part_runner.chdir)
+      if part_results is None or not part_runner.succeeded():
+        message = part_runner.error_message()
+        sublime.set_timeout(lambda: self.append_to_panel(panel,
+          'RuboCop failed:\n{0}\n'.format(message)), 0)
+        return
+      results.update(part_results)
+    lines = []
+    offense_count = 0
+    for path, offenses in results.items():
+      offense_count += len(offenses)
+      for offense in offenses:
+        lines.append(format_emacs(path, offense))
+    lines.append('')
+    lines.append('RuboCop: {0} files inspected, {1} offenses detected.'.format(
+      len(results), offense_count))
+    sublime.set_timeout(
+      lambda: self.append_to_panel(panel, '\n'.join(lines) + '\n'), 0)
+    if self.shares_results(self.used_options()):
+      self.share_results(results, states)
 
   def open_ruby_files(self):
     files = []
     views = self.view.window().views()
     for vw in views:
-      if FileTools.is_ruby_file(vw):
+      # Untitled buffers have no file to pass to rubocop
+      if FileTools.is_ruby_file(vw) and vw.file_name():
         files.append(vw.file_name())
     return files
 
@@ -263,22 +728,134 @@ class RubocopOpenAllOffensiveFilesCommand(RubocopCommand):
   def run(self, edit):
     super(RubocopOpenAllOffensiveFilesCommand, self).run(edit)
 
-    folders = self.view.window().folders()
+    folders = self.project_folders()
     if len(folders) <= 0:
       sublime.status_message('RuboCop: No project folder available.')
       return
 
-    folder = FileTools.quote(folders[0])
-
-    # Run rubocop with file formatter
-    file_list = self.runner.run([folder], ['--format files']).splitlines()
-
-    for path in file_list:
-      self.view.window().open_file(path.decode(locale.getpreferredencoding()))
-
-    sublime.status_message('RuboCop: Opened ' + str(len(file_list)) + ' files.')
+    window = self.view.window()
+    if self.is_st3():
+      # Offenses of the last project check, no need to run rubocop again
+      self.project_results(folders,
+        lambda root_results: self.open_offensive_files(window, merge_results(root_results)))
+    else:
+      self.open_files(window, FileTools.quote(folders[0]))
+
+  def open_files(self, window, folder):
+    # Run rubocop with file formatter and open each file as soon as
+    # rubocop reports it.
+    count = 0
+    for line in self.runner.stream([folder], ['--format', 'files']):
+      path = line.decode('utf-8', 'replace').strip()
+      if path:
+        count += 1
+        window.open_file(path)
+
+    sublime.status_message('RuboCop: Opened ' + str(count) + ' files.')
+
+  def open_offensive_files(self, window, results):
+    count = 0
+    for path, offenses in results.items():
+      if offenses:
+        count += 1
+        window.open_file(path)
+    sublime.status_message('RuboCop: Opened ' + str(count) + ' files.')
 
 # Shows the offense count by type
 class RubocopProjectOffenseCountCommand(RubocopCheckProjectCommand):
+  def run(self, edit):
+    if not self.is_st3():
+      super(RubocopProjectOffenseCountCommand, self).run(edit)
+      return
+    self.load_config()
+    folders = self.project_folders()
+    if len(folders) <= 0:
+      sublime.status_message('RuboCop: No project folder available.')
+      return
+    self.project_results(folders, self.show_results)
+
   def used_options(self):
     return ['--format', 'offenses']
+
+  def check_in_parallel(self):
+    # The offense summary needs to see all files in a single run
+    return False
+
+  def cop_options(self):
+    return []
+
+  def show_results(self, root_results):
+    counts = {}
+    for offenses in merge_results(root_results).values():
+      for offense in offenses:
+        counts[offense.cop_name] = counts.get(offense.cop_name, 0) + 1
+    total = sum(counts.values())
+    width = len(str(total))
+    lines = []
+    for cop_name, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+      lines.append('{0}  {1}'.format(str(count).ljust(width), cop_name))
+    lines.append('--')
+    lines.append('{0}  Total'.format(str(total).ljust(width)))
+    lines += self.error_lines()
+    panel = self.create_output_panel(self.view.window(), root_results[0][0])
+    self.append_to_panel(panel, '\n'.join(lines) + '\n')
+
+# Shows the offenses of the project grouped by cop, severity, directory
+# or file in a quick panel and opens the selected offense
+class RubocopOffenseSummaryCommand(RubocopCommand):
+  def run(self, edit):
+    super(RubocopOffenseSummaryCommand, self).run(edit)
+    window = self.view.window()
+    folders = self.project_folders()
+    if len(folders) <= 0:
+      sublime.status_message('RuboCop: No project folder available.')
+      return
+    self.project_results(folders,
+      lambda root_results: self.choose_grouping(window, folders, merge_results(root_results)))
+
+  def is_enabled(self):
+    return self.is_st3()
+
+  def choose_grouping(self, window, folders, results):
+    total = sum(len(offenses) for offenses in results.values())
+    items = [
+      [caption, '{0} offenses in {1} files'.format(total, len(results))]
+      for caption, grouping in GROUPINGS
+    ]
+
+    def on_done(i):
+      if i >= 0:
+        self.show_groups(window, folders, results, GROUPINGS[i][1])
+    self.show_quick_panel(window, items, on_done)
+
+  def show_groups(self, window, folders, results, grouping):
+    groups = ProjectResults.group(results, folders, grouping)
+    if not groups:
+      sublime.status_message('RuboCop: No offenses found.')
+      return
+    items = [
+      [name, '{0} offenses'.format(len(entries))] for name, entries in groups
+    ]
+
+    def on_done(i):
+      if i >= 0:
+        self.show_offenses(window, folders, groups[i][1])
+    self.show_quick_panel(window, items, on_done)
+
+  def show_offenses(self, window, folders, entries):
+    items = [
+      [offense.message, '{0}:{1}:{2}'.format(
+        ProjectResults.display_path(path, folders), offense.line, offense.column)]
+      for path, offense in entries
+    ]
+
+    def on_done(i):
+      if i >= 0:
+        path, offense = entries[i]
+        window.open_file('{0}:{1}:{2}'.format(path, offense.line, offense.column),
+          sublime.ENCODED_POSITION)
+    self.show_quick_panel(window, items, on_done)
+
+  def show_quick_panel(self, window, items, on_done):
+    # A quick panel can't be opened from the callback of another one
+    sublime.set_timeout(lambda: window.show_quick_panel(items, on_done), 10)
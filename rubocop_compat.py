@@ -0,0 +1,75 @@
+class OrderedDict(dict):
+  """Insertion ordered dict for Python 2.6, which Sublime Text 2 embeds
+  and which lacks collections.OrderedDict. Covers the operations used by
+  the plugin."""
+  def __init__(self, *args, **kwargs):
+    dict.__init__(self)
+    self.order = []
+    self.update(*args, **kwargs)
+
+  def __setitem__(self, key, value):
+    if not key in self:
+      self.order.append(key)
+    dict.__setitem__(self, key, value)
+
+  def __delitem__(self, key):
+    dict.__delitem__(self, key)
+    self.order.remove(key)
+
+  def __iter__(self):
+    return iter(list(self.order))
+
+  def __repr__(self):
+    return 'OrderedDict({0!r})'.format(self.items())
+
+  def keys(self):
+    return list(self.order)
+
+  def values(self):
+    return [self[key] for key in self.order]
+
+  def items(self):
+    return [(key, self[key]) for key in self.order]
+
+  def iterkeys(self):
+    return iter(self.keys())
+
+  def itervalues(self):
+    return iter(self.values())
+
+  def iteritems(self):
+    return iter(self.items())
+
+  def update(self, *args, **kwargs):
+    for other in args + (kwargs,):
+      if hasattr(other, 'keys'):
+        other = [(key, other[key]) for key in other.keys()]
+      for key, value in other:
+        self[key] = value
+
+  def setdefault(self, key, default=None):
+    if not key in self:
+      self[key] = default
+    return self[key]
+
+  def pop(self, key, *default):
+    if key in self:
+      value = self[key]
+      del self[key]
+      return value
+    if default:
+      return default[0]
+    raise KeyError(key)
+
+  def popitem(self, last=True):
+    if not self.order:
+      raise KeyError('dictionary is empty')
+    key = self.order[-1] if last else self.order[0]
+    return key, self.pop(key)
+
+  def clear(self):
+    dict.clear(self)
+    del self.order[:]
+
+  def copy(self):
+    return OrderedDict(self)
@@ -0,0 +1,204 @@
+import sublime
+import os
+import hashlib
+import threading
+
+if sublime.version() >= '3000':
+  from RuboCop.file_tools import FileTools
+  from RuboCop.rubocop_runner import RubocopRunner
+  from RuboCop.rubocop_environment import EnvironmentResolver
+  from RuboCop.constants import *
+else:
+  from file_tools import FileTools
+  from rubocop_runner import RubocopRunner
+  from rubocop_environment import EnvironmentResolver
+  from constants import *
+
+# All settings of the plugin. Each of them can be overridden by the
+# settings of a view (e.g. inside a project file).
+SETTING_NAMES = [
+  'rubocop_command',
+  'check_for_rvm',
+  'rvm_auto_ruby_path',
+  'check_for_rbenv',
+  'rbenv_path',
+  'resolve_ruby_environment',
+  'mark_issues_in_view',
+  'mark_icon',
+  'mark_styles',
+  'max_marked_offenses',
+  'check_while_typing',
+  'check_while_typing_delay',
+  'max_concurrent_checks',
+  'check_timeout',
+  'fast_check_cops',
+  'skip_excluded_files',
+  'project_check_processes',
+  'incremental_project_check',
+  'result_cache_size',
+  'persist_result_cache',
+  'performance_log_size',
+  'show_auto_correct_warning',
+  'auto_correct_in_buffer',
+  'rubocop_config_file',
+  'rubocop_chdir',
+  'rubocop_disable',
+  'rubocop_server',
+  'rubocop_server_idle_timeout',
+  'manage_rubocop_cache',
+  'prewarm_rubocop_cache'
+]
+# Key used to register the settings change callbacks
+WATCH_KEY = 'rubocop_config'
+
+class RubocopConfig(object):
+  """Immutable snapshot of the effective settings of a view (package
+  settings overridden by view settings) together with a prepared runner.
+  Snapshots are cached and dropped as soon as the settings change."""
+  snapshots = {}
+  lock = threading.Lock()
+  watching = False
+
+  def __init__(self, values, path):
+    self.values = values
+    self.path = path
+    self.runner_template = None
+
+  def for_path(self, path):
+    """Configuration of the file at path with the same settings, e.g. to
+    run it in the project root of that file"""
+    return RubocopConfig(self.values, path)
+
+  @classmethod
+  def for_view(cls, view):
+    cls.watch()
+    view_id = view.id()
+    path = view.file_name()
+    with cls.lock:
+      config = cls.snapshots.get(view_id)
+    # A renamed file might end up with a different project root
+    if config and config.path == path:
+      return config
+
+    s = sublime.load_settings(SETTINGS_FILE)
+    view_settings = view.settings()
+    values = {}
+    for name in SETTING_NAMES:
+      values[name] = view_settings.get(name, s.get(name))
+    config = cls(values, path)
+    with cls.lock:
+      cls.snapshots[view_id] = config
+    view_settings.clear_on_change(WATCH_KEY)
+    view_settings.add_on_change(WATCH_KEY, lambda: cls.invalidate(view_id))
+    return config
+
+  @classmethod
+  def for_package(cls):
+    """Snapshot of the package settings without any view overrides"""
+    cls.watch()
+    with cls.lock:
+      config = cls.snapshots.get(None)
+    if config:
+      return config
+
+    s = sublime.load_settings(SETTINGS_FILE)
+    values = {}
+    for name in SETTING_NAMES:
+      values[name] = s.get(name)
+    config = cls(values, None)
+    with cls.lock:
+      cls.snapshots[None] = config
+    return config
+
+  @classmethod
+  def watch(cls):
+    if cls.watching:
+      return
+    cls.watching = True
+    s = sublime.load_settings(SETTINGS_FILE)
+    s.clear_on_change(WATCH_KEY)
+    s.add_on_change(WATCH_KEY, cls.invalidate_all)
+
+  @classmethod
+  def invalidate(cls, view_id):
+    with cls.lock:
+      cls.snapshots.pop(view_id, None)
+
+  @classmethod
+  def invalidate_all(cls):
+    with cls.lock:
+      cls.snapshots.clear()
+
+  def get(self, name, default=None):
+    value = self.values.get(name)
+    if value is None:
+      return default
+    return value
+
+  def project_root(self):
+    chdir = self.get('rubocop_chdir')
+    if chdir or not self.path:
+      return chdir
+    return FileTools.project_root(self.path)
+
+  def rubocop_cache_root(self, root=None):
+    """Folder for rubocop's own result cache of the project (or of the
+    given project root), if the plugin manages it"""
+    if not self.get('manage_rubocop_cache') or sublime.version() < '3000':
+      return None
+    root = root or self.project_root()
+    if not root:
+      return None
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()
+    return os.path.join(sublime.cache_path(), 'RuboCop', 'rubocop_cache', digest[:16])
+
+  def fast_check_options(self):
+    """Options which select the cops of the fast in-view check, or an
+    empty list if there is no fast check"""
+    cops = self.get('fast_check_cops')
+    if not cops or sublime.version() < '3000':
+      return []
+    if cops == 'lint':
+      return ['--lint']
+    return ['--only', ','.join(cops)]
+
+  def create_runner(self, resolve=True):
+    """Returns a fresh runner for this configuration. Resolving the Ruby
+    environment might spawn a process the first time it is done for a
+    project, so pass resolve=False on the UI thread."""
+    with RubocopConfig.lock:
+      if self.runner_template is None:
+        self.runner_template = self.build_runner()
+      runner = self.runner_template.clone()
+    if resolve and runner.resolve_environment:
+      EnvironmentResolver.instance().apply(runner, self.project_root())
+    return runner
+
+  def build_runner(self):
+    chdir = self.get('rubocop_chdir')
+    use_server = self.get('rubocop_server')
+    if use_server and not chdir and self.path:
+      # The server is bound to the working directory it was started in
+      chdir = FileTools.project_root(self.path)
+
+    cfg_file = self.get('rubocop_config_file')
+    if cfg_file:
+      cfg_file = FileTools.quote(cfg_file)
+
+    return RubocopRunner(
+      {
+        'use_rbenv': self.get('check_for_rbenv'),
+        'use_rvm': self.get('check_for_rvm'),
+        'custom_rubocop_cmd': self.get('rubocop_command'),
+        'rvm_auto_ruby_path': self.get('rvm_auto_ruby_path'),
+        'rbenv_path': self.get('rbenv_path'),
+        'on_windows': sublime.platform() == 'windows',
+        'rubocop_config_file': cfg_file,
+        'rubocop_config_path': self.get('rubocop_config_file'),
+        'cache_root': self.rubocop_cache_root(),
+        'chdir': chdir,
+        'server_mode': use_server,
+        'resolve_environment': self.get('resolve_ruby_environment'),
+        'is_st2': sublime.version() < '3000'
+      }
+    )
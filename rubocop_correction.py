@@ -0,0 +1,76 @@
+import difflib
+
+# Spans of more changed lines (old times new) than this are replaced as a
+# whole instead of being diffed, which takes quadratic time
+MAX_DIFF_SIZE = 250000
+
+def correction_options(path):
+  """Options to auto correct the source passed on stdin as if it was
+  stored at path. --stderr moves the report out of the way, so stdout
+  only carries the corrected source. rubocop never prints the source for
+  the json formatter, hence the emacs one."""
+  return ['--format', 'emacs', '--stderr', '-a', '--stdin', path]
+
+def corrected_source(output, content):
+  """Returns the corrected source of a run with correction_options or
+  None if rubocop did not print it"""
+  if not isinstance(output, str):
+    output = output.decode('utf-8', 'replace')
+  if not output and content:
+    return None
+  return output
+
+def replacements(old, new):
+  """Returns the (begin, end, text) replacements turning old into new,
+  line by line and ordered from the end of the text to its beginning so
+  they can be applied one after the other without shifting positions."""
+  old_lines = old.splitlines(True)
+  new_lines = new.splitlines(True)
+  starts = [0]
+  for line in old_lines:
+    starts.append(starts[-1] + len(line))
+
+  # Only the span between the common prefix and suffix gets diffed
+  first = 0
+  limit = min(len(old_lines), len(new_lines))
+  while first < limit and old_lines[first] == new_lines[first]:
+    first += 1
+  old_end = len(old_lines)
+  new_end = len(new_lines)
+  while (old_end > first and new_end > first and
+      old_lines[old_end - 1] == new_lines[new_end - 1]):
+    old_end -= 1
+    new_end -= 1
+
+  result = []
+  for i1, i2, j1, j2 in changed_spans(old_lines, new_lines, first, old_end,
+      first, new_end):
+    result.append([starts[i1], starts[i2], ''.join(new_lines[j1:j2])])
+  result.reverse()
+  return result
+
+def changed_spans(old_lines, new_lines, i1, i2, j1, j2):
+  """Yields the (i1, i2, j1, j2) line spans of old_lines which differ
+  from new_lines within the given spans"""
+  if i2 - i1 == j2 - j1:
+    # Most corrections keep the lines in place (whitespace, quotes, ...)
+    begin = None
+    for i in range(i2 - i1):
+      if old_lines[i1 + i] != new_lines[j1 + i]:
+        if begin is None:
+          begin = i
+      elif begin is not None:
+        yield i1 + begin, i1 + i, j1 + begin, j1 + i
+        begin = None
+    if begin is not None:
+      yield i1 + begin, i2, j1 + begin, j2
+    return
+  if (i2 - i1) * (j2 - j1) > MAX_DIFF_SIZE:
+    # Diffing gets too slow, the whole span is replaced instead
+    yield i1, i2, j1, j2
+    return
+  matcher = difflib.SequenceMatcher(None, old_lines[i1:i2], new_lines[j1:j2],
+    autojunk=False)
+  for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+    if tag != 'equal':
+      yield i1 + a1, i1 + a2, j1 + b1, j1 + b2
@@ -0,0 +1,166 @@
+import os
+import json
+import threading
+import time
+
+# Files which influence the Ruby version or the gems a version manager
+# picks for a project.
+VERSION_FILES = [
+  '.ruby-version',
+  '.ruby-gemset',
+  '.rvmrc',
+  '.tool-versions',
+  'Gemfile.lock'
+]
+GLOBAL_VERSION_FILES = [
+  '~/.rbenv/version',
+  '~/.rvm/config/alias'
+]
+ENVIRONMENT_KEYS = [
+  'PATH', 'GEM_HOME', 'GEM_PATH', 'RUBY_VERSION', 'MY_RUBY_HOME',
+  'RUBYLIB', 'RUBYOPT', 'RBENV_VERSION', 'RBENV_ROOT'
+]
+# Seconds during which the version files are not checked again
+STAMP_CHECK_INTERVAL = 5
+# Prints the interpreter, the rubocop executable and the relevant parts
+# of the environment which the version manager set up.
+RESOLVE_SCRIPT = (
+  "require 'json'; require 'rbconfig'; "
+  "keys = ENV['RUBOCOP_ENV_KEYS'].split(','); "
+  "env = {}; keys.each { |k| env[k] = ENV[k] if ENV[k] }; "
+  "print JSON.generate('ruby' => RbConfig.ruby, "
+  "'rubocop' => Gem.bin_path('rubocop', 'rubocop'), 'env' => env)"
+)
+
+class ResolvedEnvironment(object):
+  """Concrete ruby and rubocop executables of a project root"""
+  def __init__(self, root, command, env, stamp):
+    self.root = root
+    self.command = command
+    self.env = env
+    self.stamp = stamp
+    self.checked = time.time()
+
+class EnvironmentResolver(object):
+  """Works out the ruby interpreter and rubocop executable which rvm,
+  rbenv or the ruby found in PATH would use for a project root, so runs
+  do not have to go through the version manager's shims every time.
+  Results are cached until one of the version files changes."""
+  resolver_instance = None
+
+  def __init__(self):
+    self.environments = {}
+    # key -> event set once the resolution in progress finished
+    self.resolving = {}
+    self.lock = threading.Lock()
+
+  @classmethod
+  def instance(cls):
+    if cls.resolver_instance is None:
+      cls.resolver_instance = cls()
+    return cls.resolver_instance
+
+  def key(self, runner, root):
+    return (
+      root,
+      bool(runner.use_rvm),
+      bool(runner.use_rbenv),
+      runner.rvm_auto_ruby_path,
+      runner.rbenv_path
+    )
+
+  def apply(self, runner, root):
+    """Lets runner call the resolved executables directly. Keeps the
+    runner untouched if it uses a custom command or resolving failed."""
+    if runner.custom_rubocop_cmd or not root:
+      return
+    environment = self.resolve(runner, root)
+    if environment and environment.command:
+      runner.resolved_command = list(environment.command)
+      runner.env = dict(environment.env)
+
+  def resolve(self, runner, root):
+    key = self.key(runner, root)
+    while True:
+      with self.lock:
+        environment = self.environments.get(key)
+        if environment and time.time() - environment.checked < STAMP_CHECK_INTERVAL:
+          return environment
+        pending = self.resolving.get(key)
+        if pending is None:
+          pending = threading.Event()
+          self.resolving[key] = pending
+          break
+      # Another thread resolves the same root, its result gets shared
+      pending.wait()
+
+    # The version manager might take seconds, so other roots are resolved
+    # at the same time
+    try:
+      stamp = self.stamp(root)
+      if environment and environment.stamp == stamp:
+        environment.checked = time.time()
+        return environment
+      environment = ResolvedEnvironment(root, None, {}, stamp)
+      environment.command, environment.env = self.run_resolver(runner, root)
+      with self.lock:
+        self.environments[key] = environment
+      return environment
+    finally:
+      with self.lock:
+        del self.resolving[key]
+      pending.set()
+
+  def cached(self, runner, root):
+    with self.lock:
+      return self.environments.get(self.key(runner, root))
+
+  def invalidate(self):
+    with self.lock:
+      self.environments.clear()
+
+  def run_resolver(self, runner, root):
+    probe = runner.clone()
+    probe.chdir = root
+    probe.load_cmd_prefix()
+    call_list = probe.cmd_prefix + ['ruby', '-e', RESOLVE_SCRIPT]
+    env = dict(os.environ)
+    env['RUBOCOP_ENV_KEYS'] = ','.join(ENVIRONMENT_KEYS)
+    probe.env = env
+    try:
+      output = probe.execute(call_list)
+    except OSError:
+      return None, {}
+    if probe.returncode != 0:
+      return None, {}
+    try:
+      data = json.loads(output.decode('utf-8', 'replace'))
+    except ValueError:
+      return None, {}
+    return [data['ruby'], data['rubocop']], data.get('env') or {}
+
+  def stamp(self, root):
+    stamp = []
+    paths = [os.path.expanduser(path) for path in GLOBAL_VERSION_FILES]
+    for name in VERSION_FILES:
+      path = self.nearest_file(root, name)
+      if path:
+        paths.append(path)
+    for path in paths:
+      try:
+        st = os.stat(path)
+        stamp.append((path, st.st_mtime, st.st_size))
+      except OSError:
+        pass
+    return stamp
+
+  def nearest_file(self, root, name):
+    current = root
+    while True:
+      path = os.path.join(current, name)
+      if os.path.isfile(path):
+        return path
+      parent = os.path.dirname(current)
+      if parent == current:
+        return None
+      current = parent
@@ -0,0 +1,146 @@
+import sublime
+import os
+import json
+import hashlib
+import threading
+
+if sublime.version() >= '3000':
+  from RuboCop.rubocop_cache import ResultCache
+  from RuboCop.rubocop_results import Offense
+else:
+  from rubocop_cache import ResultCache
+  from rubocop_results import Offense
+
+INDEX_VERSION = 1
+
+class FileIndex(object):
+  """Remembers the offenses of the files of a project together with the
+  state of each file (mtime, size and content hash) and a fingerprint of
+  its effective configuration. The index is stored as json file."""
+  loaded_indexes = {}
+
+  def __init__(self, path):
+    self.path = path
+    self.files = {}
+    self.observed = {}
+    self.config_dirs = {}
+    self.config_states = {}
+    self.lock = threading.Lock()
+
+  @classmethod
+  def open(cls, path):
+    """Returns the index stored at path. Indexes stay loaded, so only
+    the first run of a session has to read the file."""
+    index = cls.loaded_indexes.get(path)
+    if index is None:
+      index = cls(path)
+      index.load()
+      cls.loaded_indexes[path] = index
+    index.reset_config_states()
+    return index
+
+  @staticmethod
+  def file_name(folder, command):
+    key = '{0}\x00{1}'.format(folder, command).encode('utf-8')
+    return hashlib.sha1(key).hexdigest() + '.json'
+
+  def load(self):
+    try:
+      with open(self.path, 'rb') as f:
+        data = json.loads(f.read().decode('utf-8'))
+    except (IOError, OSError, ValueError):
+      return
+    if data.get('version') == INDEX_VERSION:
+      self.files = data.get('files', {})
+
+  def save(self):
+    data = {'version': INDEX_VERSION, 'files': self.files}
+    try:
+      folder = os.path.dirname(self.path)
+      if not os.path.isdir(folder):
+        os.makedirs(folder)
+      tmp_path = self.path + '.tmp'
+      with open(tmp_path, 'wb') as f:
+        f.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+      if os.path.exists(self.path):
+        os.remove(self.path)
+      os.rename(tmp_path, self.path)
+    except (IOError, OSError):
+      pass
+
+  def reset_config_states(self):
+    # Config files might have changed between two runs
+    self.config_dirs = {}
+    self.config_states = {}
+
+  def config_fingerprint(self, path, command, config_file):
+    folder = os.path.dirname(path)
+    if not folder in self.config_dirs:
+      self.config_dirs[folder] = ResultCache.nearest_config(path)
+    parts = [command]
+    # Includes the files the configs inherit from, like .rubocop_todo.yml
+    configs = (config_file, self.config_dirs[folder])
+    if not configs in self.config_states:
+      self.config_states[configs] = ResultCache.config_states(configs)
+    parts += self.config_states[configs]
+    return '\x00'.join(parts)
+
+  def lookup(self, path, config):
+    """Returns the stored offenses of path if neither the file nor its
+    configuration changed, otherwise None"""
+    try:
+      st = os.stat(path)
+    except OSError:
+      return None
+    entry = self.files.get(path)
+    if entry is None or entry[3] != config:
+      self.observed[path] = (st.st_mtime, st.st_size, None)
+      return None
+    mtime, size, digest = entry[0], entry[1], entry[2]
+    if mtime == st.st_mtime and size == st.st_size:
+      return self.offenses(entry)
+    # The file was touched, but it might still have the same content
+    current_digest = self.digest(path)
+    if current_digest == digest:
+      entry[0], entry[1] = st.st_mtime, st.st_size
+      return self.offenses(entry)
+    self.observed[path] = (st.st_mtime, st.st_size, current_digest)
+    return None
+
+  def update(self, path, offenses, config):
+    mtime, size, digest = self.observed.pop(path, (None, None, None))
+    if mtime is None:
+      try:
+        st = os.stat(path)
+      except OSError:
+        return
+      mtime, size = st.st_mtime, st.st_size
+    if digest is None:
+      digest = self.digest(path)
+    self.files[path] = [
+      mtime, size, digest, config,
+      [offense.to_list() for offense in offenses]
+    ]
+
+  def retain(self, paths):
+    """Drops all files which are no longer part of the project. An empty
+    list most likely means that listing the files failed, so the index
+    is kept."""
+    if not paths:
+      self.observed = {}
+      return
+    keep = set(paths)
+    for path in list(self.files.keys()):
+      if not path in keep:
+        del self.files[path]
+    self.observed = {}
+
+  def offenses(self, entry):
+    return [Offense(*values) for values in entry[4]]
+
+  def digest(self, path):
+    try:
+      with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError):
+      return None
@@ -1,131 +1,526 @@
 import sublime
 import sublime_plugin
-import locale
-import re
 import os
+import time
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
 
 if sublime.version() >= '3000':
   from RuboCop.file_tools import FileTools
-  from RuboCop.rubocop_runner import RubocopRunner
+  from RuboCop.rubocop_config import RubocopConfig
+  from RuboCop.rubocop_worker import RubocopWorkerPool
+  from RuboCop.rubocop_cache import ResultCache
+  from RuboCop.rubocop_results import *
+  from RuboCop.rubocop_scheduler import RubocopScheduler
+  from RuboCop.rubocop_marks import MarkRenderer
+  from RuboCop.rubocop_stats import RunStats
+  from RuboCop.rubocop_prewarm import CachePrewarmer
+  from RuboCop.rubocop_project_results import ProjectResults
+  from RuboCop.rubocop_target_files import TargetFiles
+  from RuboCop.rubocop_parallel import command_chunks
   from RuboCop.constants import *
 else:
   from file_tools import FileTools
-  from rubocop_runner import RubocopRunner
+  from rubocop_config import RubocopConfig
+  from rubocop_worker import RubocopWorkerPool
+  from rubocop_cache import ResultCache
+  from rubocop_results import *
+  from rubocop_scheduler import RubocopScheduler
+  from rubocop_marks import MarkRenderer
+  from rubocop_stats import RunStats
+  from rubocop_prewarm import CachePrewarmer
+  from rubocop_project_results import ProjectResults
+  from rubocop_target_files import TargetFiles
+  from rubocop_parallel import command_chunks
   from constants import *
 
+def plugin_unloaded():
+  RubocopScheduler.instance().cancel_all()
+  RubocopWorkerPool.instance().shutdown()
+  CachePrewarmer.instance().cancel()
+
+CHECK_OPTIONS = ['--format', 'json', '--force-exclusion']
+# Maximum number of files passed to a single rubocop run
+BATCH_SIZE = 50
+# Milliseconds to wait after the plugin got loaded before the open views
+# get marked, so the editor can finish its own startup first
+STARTUP_DELAY = 1000
+# Background tabs are checked a few at a time whenever no other check is
+# running, waiting IDLE_DELAY milliseconds between two batches
+IDLE_DELAY = 500
+BACKGROUND_BATCH_SIZE = 5
+# Status bar key telling that only the offenses of the fast check are marked
+TIER_KEY = 'rubocop_tier'
+
 # Event listener to provide on the fly checks when saving a ruby file.
 class RubocopEventListener(sublime_plugin.EventListener):
   listener_instance = None
 
   def __init__(self):
     super(RubocopEventListener, self).__init__()
-    self.file_remark_dict = {}
+    self.marks = MarkRenderer()
+    self.unchecked_views = OrderedDict()
+    self.startup_generation = 0
     RubocopEventListener.listener_instance = self
     if sublime.version() >= '3000':
-      sublime.set_timeout_async(self.update_marks, 2)
+      sublime.set_timeout_async(self.update_marks, STARTUP_DELAY)
 
   @classmethod
   def instance(cls):
     return cls.listener_instance
 
-  def get_current_file_dict(self, view):
-    if not (view.file_name() in self.file_remark_dict.keys()):
-      return None
-
-    return self.file_remark_dict[view.file_name()]
+  def get_offense_index(self, view):
+    return self.marks.index(view)
 
   def clear_marks(self, view):
-    dct = self.get_current_file_dict(view)
-    if dct:
-      dct.clear()
-    view.erase_regions(REGIONS_ID)
+    self.marks.clear(view)
 
   def update_marks(self):
+    self.startup_generation += 1
+    self.unchecked_views.clear()
+    active, visible, background = self.views_by_visibility()
+    for vw in active + visible + background:
+      self.clear_marks(vw)
+    if not RubocopConfig.for_package().get('mark_issues_in_view'):
+      # A running check would mark the views again once it finishes
+      self.scheduler().cancel('update_marks')
+      return
+    if sublime.version() < '3000':
+      self.check_views(active + visible + background)
+      return
+
+    # The active views go first, followed by the other visible views.
+    # Background tabs are checked when idle or when they get activated,
+    # whichever comes first.
+    for vw in background:
+      self.unchecked_views[vw.id()] = vw
+    generation = self.startup_generation
+
+    def check_visible_views(job):
+      self.check_views(active, job)
+      self.check_views(visible, job)
+      if not job.cancelled:
+        sublime.set_timeout_async(
+          lambda: self.check_background_views(generation), IDLE_DELAY)
+    self.scheduler().submit('update_marks', check_visible_views, 1)
+
+  def views_by_visibility(self):
+    """Returns the Ruby views of all windows split into the active views,
+    the other visible views and the background tabs"""
+    active = []
+    visible = []
+    background = []
     for wnd in sublime.windows():
+      active_view = wnd.active_view()
+      visible_ids = set()
+      for group in range(wnd.num_groups()):
+        vw = wnd.active_view_in_group(group)
+        if vw:
+          visible_ids.add(vw.id())
       for vw in wnd.views():
-        self.do_in_file_check(vw)
+        if not FileTools.is_ruby_file(vw):
+          continue
+        if active_view and vw.id() == active_view.id():
+          active.append(vw)
+        elif vw.id() in visible_ids:
+          visible.append(vw)
+        else:
+          background.append(vw)
+    return active, visible, background
 
-  def line_no_of_cop_result(self, file_name, result):
-    res = result.decode(locale.getpreferredencoding())
-    reg_result = re.search(r"^.*:(\d*):\d*: .: (.*)$", res)
-    if reg_result:
-      return reg_result.group(1), reg_result.group(2).strip()
-    return None, None
+  def check_background_views(self, generation):
+    if generation != self.startup_generation or not self.unchecked_views:
+      return
+    scheduler = self.scheduler()
+    if not scheduler.idle():
+      sublime.set_timeout_async(
+        lambda: self.check_background_views(generation), IDLE_DELAY)
+      return
+    views = []
+    while self.unchecked_views and len(views) < BACKGROUND_BATCH_SIZE:
+      views.append(self.unchecked_views.popitem(last=False)[1])
 
-  def set_marks_by_results(self, view, cop_results):
-    lines = []
-    path = view.file_name()
-    base_file = os.path.basename(path)
-    view_dict = self.get_current_file_dict(view)
-    if not view_dict:
-      view_dict = {}
-      self.file_remark_dict[path] = view_dict
-    for result in cop_results:
-      line_no, message = self.line_no_of_cop_result(base_file, result)
-      if line_no is not None:
-        ln = int(line_no) - 1
-        view_dict[ln] = message
-        line = view.line(view.text_point(ln, 0))
-        lines.append(sublime.Region(line.begin(), line.end()))
-    self.mark_lines(view, lines)
-
-  def mark_lines(self, view, lines):
-    s = sublime.load_settings(SETTINGS_FILE)
-    icon = s.get('mark_icon') or 'arrow_right'
-    view.add_regions(REGIONS_ID, lines, 'keyword', icon,
-        REGIONS_OPTIONS_BITS)
-
-  def run_rubocop(self, view):
-    s = sublime.load_settings(SETTINGS_FILE)
-
-    rubocop_disable = view.settings().get(
-      'rubocop_disable',
-      s.get('rubocop_disable'),
-    )
+    def check_batch(job):
+      self.check_views(views, job)
+      if not job.cancelled:
+        sublime.set_timeout_async(
+          lambda: self.check_background_views(generation), IDLE_DELAY)
+    scheduler.submit('update_marks', check_batch, -1)
+
+  def set_marks_by_results(self, view, offenses, stats=None):
+    started = time.time()
+    config = RubocopConfig.for_view(view)
+    # Replaces the current marks without clearing them first, so they
+    # don't flicker
+    self.marks.render_offenses(view, offenses, self.mark_styles(config),
+      config.get('max_marked_offenses', 0))
+    if stats:
+      stats['offenses'] += len(offenses)
+      stats['render'] += time.time() - started
+
+  def mark_styles(self, config):
+    icon = config.get('mark_icon', 'arrow_right')
+    custom_styles = config.get('mark_styles', {})
+    styles = {}
+    for severity in MARK_SEVERITIES:
+      style = custom_styles.get(severity) or {}
+      styles[severity] = (
+        style.get('scope', DEFAULT_MARK_SCOPES[severity]),
+        style.get('icon', icon)
+      )
+    return styles
 
-    if rubocop_disable:
+  def create_runner(self, config):
+    if config.get('rubocop_disable'):
+      return None
+    runner = config.create_runner()
+    runner.timeout = config.get('check_timeout', 0)
+    return runner
+
+  def run_rubocop(self, view, content=None, job=None, stats=None,
+      cop_options=[], cached_only=False):
+    """Returns the offenses of the file shown in view or None if the run
+    got superseded or timed out. cop_options select the cops to run. With
+    cached_only the result is only looked up in the cache and None is
+    returned if it is not there. Timings are added to the stats record."""
+    config = RubocopConfig.for_view(view)
+    runner = self.create_runner(config)
+    if runner is None:
       return []
+    if job:
+      job.attach(runner)
 
+    path = view.file_name()
+    options = CHECK_OPTIONS + cop_options
+    if content is None:
+      pathlist = [path]
+      payload = None
+      source = self.read_file(path)
+    else:
+      # Let rubocop inspect the unsaved buffer contents as if they
+      # were stored at the path of the file.
+      options += ['--stdin', path]
+      pathlist = []
+      payload = content.encode('utf-8')
+      source = payload
 
-    use_rvm = view.settings().get('check_for_rvm', s.get('check_for_rvm'))
-    use_rbenv = view.settings().get('check_for_rbenv', s.get('check_for_rbenv'))
-    cmd = view.settings().get('rubocop_command', s.get('rubocop_command'))
-    rvm_path = view.settings().get('rvm_auto_ruby_path', s.get('rvm_auto_ruby_path'))
-    rbenv_path = view.settings().get('rbenv_path', s.get('rbenv_path'))
-    cfg_file = view.settings().get('rubocop_config_file', s.get('rubocop_config_file'))
-    chdir = view.settings().get('rubocop_chdir', s.get('rubocop_chdir'))
-
-    if cfg_file:
-      cfg_file = FileTools.quote(cfg_file)
-
-    runner = RubocopRunner(
-      {
-        'use_rbenv': use_rbenv,
-        'use_rvm': use_rvm,
-        'custom_rubocop_cmd': cmd,
-        'rvm_auto_ruby_path': rvm_path,
-        'rbenv_path': rbenv_path,
-        'on_windows': sublime.platform() == 'windows',
-        'rubocop_config_file': cfg_file,
-        'chdir': chdir,
-        'is_st2': sublime.version() < '3000'
-      }
-    )
-    output = runner.run([view.file_name()], ['--format', 'emacs', '--force-exclusion']).splitlines()
+    cache = self.result_cache(config)
+    key = self.cache_key(cache, runner, path, options, source)
+    offenses = self.cached_offenses(cache, key)
+    if offenses is not None:
+      if stats:
+        stats['cached'] = True
+      return offenses
+    if cached_only:
+      return None
+
+    output = self.execute(runner, config, pathlist, options, payload)
+    if stats:
+      RunStats.add_runner(stats, runner)
+    if self.run_aborted(runner, view):
+      return None
+    started = time.time()
+    results = parse_json(output, runner.chdir)
+    offenses = (results or {}).get(normalize_path(path), [])
+    if stats:
+      stats['parse'] = time.time() - started
+    if runner.succeeded() and results is not None:
+      self.learn_target(config, path, results)
+    # A run without a report (e.g. rubocop failed to load) tells nothing
+    if key and runner.succeeded() and normalize_path(path) in (results or {}):
+      cache.put(key, encode_offenses(offenses))
+
+    return offenses
+
+  def execute(self, runner, config, pathlist, options, payload=None):
+    if runner.server_mode:
+      idle_timeout = config.get('rubocop_server_idle_timeout', 0)
+      runner.use_server = RubocopWorkerPool.instance().acquire(runner, idle_timeout)
+    return runner.run(pathlist, options, payload)
 
-    return output
+  def run_aborted(self, runner, view):
+    if runner.timed_out:
+      sublime.status_message('RuboCop: Check of {0} timed out.'.format(
+        os.path.basename(view.file_name())))
+    return runner.cancelled or runner.timed_out
+
+  def cached_offenses(self, cache, key):
+    if not key:
+      return None
+    data = cache.get(key)
+    if data is None:
+      return None
+    return decode_offenses(data)
+
+  def cache_key(self, cache, runner, path, options, source):
+    if not cache.enabled() or source is None:
+      return None
+    # Stored results might outlive an upgrade of rubocop. Asking for the
+    # version costs a rubocop start once per session, so it is skipped for
+    # results which only live in memory.
+    version = runner.version() if cache.cache_dir else None
+    fingerprint = ResultCache.fingerprint(
+      runner.command_list([path], options), path, runner.rubocop_config_path,
+      version)
+    return ResultCache.key(source, fingerprint)
 
-  def mark_issues(self, view, mark):
-    self.clear_marks(view)
-    if mark:
-      results = self.run_rubocop(view)
-      self.set_marks_by_results(view, results)
+  def check_views(self, views, job=None):
+    """Checks the files of all given views with as few rubocop runs as
+    possible. Views sharing the same runner configuration are checked
+    together and a file which is open in several views is checked once."""
+    cache = self.result_cache(RubocopConfig.for_package())
+    batches = OrderedDict()
+    for vw in views:
+      path = vw.file_name()
+      if not path:
+        continue
+      config = RubocopConfig.for_view(vw)
+      runner = self.create_runner(config)
+      if runner is None or self.is_excluded(vw):
+        continue
+      batch_key = (runner.chdir, tuple(runner.command_list([], CHECK_OPTIONS)))
+      if not batch_key in batches:
+        batches[batch_key] = (runner, config, OrderedDict())
+      batches[batch_key][2].setdefault(path, []).append(vw)
+
+    for runner, config, files in batches.values():
+      if job and job.cancelled:
+        return
+      pending = OrderedDict()
+      for path, vws in files.items():
+        key = self.cache_key(cache, runner, path, CHECK_OPTIONS, self.read_file(path))
+        offenses = self.cached_offenses(cache, key)
+        if offenses is None:
+          pending[path] = (key, vws)
+        else:
+          stats = RunStats.start(path)
+          stats['cached'] = True
+          self.set_marks_for_views(vws, offenses, stats)
+          self.record_stats(stats)
+
+      paths = list(pending.keys())
+      chunks = []
+      for i in range(0, len(paths), BATCH_SIZE):
+        chunks += command_chunks(runner, CHECK_OPTIONS, paths[i:i + BATCH_SIZE])
+      for chunk in chunks:
+        chunk_runner = runner.clone()
+        if job:
+          if job.cancelled:
+            return
+          job.attach(chunk_runner)
+        stats = RunStats.start('{0} (+{1} files)'.format(chunk[0], len(chunk) - 1))
+        output = self.execute(chunk_runner, config, chunk, list(CHECK_OPTIONS))
+        RunStats.add_runner(stats, chunk_runner)
+        if self.run_aborted(chunk_runner, pending[chunk[0]][1][0]):
+          if chunk_runner.cancelled:
+            return
+          # The other chunks might still finish in time
+          continue
+        # The job might have been cancelled right after rubocop finished
+        if job and job.cancelled:
+          return
+        started = time.time()
+        results = parse_json(output, chunk_runner.chdir)
+        stats['parse'] = time.time() - started
+        for path in chunk:
+          key, vws = pending[path]
+          offenses = (results or {}).get(normalize_path(path), [])
+          if chunk_runner.succeeded() and results is not None:
+            self.learn_target(config, path, results)
+          if (key and chunk_runner.succeeded() and
+              normalize_path(path) in (results or {})):
+            cache.put(key, encode_offenses(offenses))
+          self.set_marks_for_views(vws, offenses, stats)
+        self.record_stats(stats)
+
+  def apply_project_results(self, results, states, config):
+    """Takes over the offenses of a check of several files (path ->
+    offenses), which ran with the cops of the in-view checks. The open
+    views of those files get marked and the offenses get cached for
+    files which are opened later on. Files whose state (path -> (mtime,
+    size) before the check) changed since are left out, their results
+    are outdated."""
+    if config.get('rubocop_disable'):
+      return
+    fresh = OrderedDict()
+    for path, offenses in results.items():
+      state = states.get(path)
+      if state is not None and FileTools.file_state(path) == state:
+        fresh[path] = offenses
+    results = fresh
+    cache = self.result_cache(config)
+    paths = list(results.keys())
+    if not cache.cache_dir:
+      # Only the latest entries would survive in memory anyway
+      paths = paths[-cache.max_entries:] if cache.max_entries else []
+    # The files might belong to several roots, each with its own Ruby
+    # environment and cache root, just like their in-view checks
+    folder_runners = {}
+    root_runners = {}
+    for path in paths:
+      folder = os.path.dirname(path)
+      if not folder in folder_runners:
+        file_config = config.for_path(path)
+        root = file_config.project_root()
+        if not root in root_runners:
+          root_runners[root] = self.create_runner(file_config)
+        folder_runners[folder] = root_runners[root]
+      runner = folder_runners[folder]
+      key = self.cache_key(cache, runner, path, CHECK_OPTIONS, self.read_file(path))
+      if key:
+        cache.put(key, encode_offenses(results[path]))
+    project_results = ProjectResults.instance()
+    for path, offenses in results.items():
+      project_results.update(path, offenses)
+
+    views = OrderedDict()
+    for wnd in sublime.windows():
+      for vw in wnd.views():
+        path = vw.file_name()
+        # Unsaved changes are not covered by the results
+        if not path or vw.is_dirty() or not FileTools.is_ruby_file(vw):
+          continue
+        path = normalize_path(path)
+        if path in results and RubocopConfig.for_view(vw).get('mark_issues_in_view'):
+          self.unchecked_views.pop(vw.id(), None)
+          views.setdefault(path, []).append(vw)
+    for path, vws in views.items():
+      self.set_marks_for_views(vws, results[path])
+
+  def set_marks_for_views(self, views, offenses, stats=None, fast=False):
+    # Offenses of the fast check lack the other cops, so they are kept
+    # out of the project results
+    if views and views[0].file_name() and not fast:
+      ProjectResults.instance().update(views[0].file_name(), offenses)
+    for vw in views:
+      self.set_marks_by_results(vw, offenses, stats)
+      if fast:
+        vw.set_status(TIER_KEY, 'RuboCop: fast check, waiting for all cops')
+      else:
+        vw.erase_status(TIER_KEY)
+
+  def record_stats(self, stats):
+    run_stats = RunStats.instance()
+    run_stats.configure(RubocopConfig.for_package().get('performance_log_size', 0))
+    run_stats.record(stats)
+
+  def read_file(self, path):
+    try:
+      with open(path, 'rb') as f:
+        return f.read()
+    except (IOError, OSError):
+      return None
+
+  def result_cache(self, config):
+    cache_dir = None
+    if config.get('persist_result_cache') and sublime.version() >= '3000':
+      cache_dir = os.path.join(sublime.cache_path(), 'RuboCop', 'results')
+    cache = ResultCache.instance()
+    cache.configure(config.get('result_cache_size', 0), cache_dir)
+    return cache
+
+  def mark_issues(self, view, mark, job=None):
+    if not mark:
+      self.clear_marks(view)
+      return
+    self.check_in_tiers(view, job=job)
+
+  def check_in_tiers(self, view, content=None, job=None, change_count=None):
+    """Marks the offenses of the file shown in view (or of the unsaved
+    content). If a fast check is configured and the result of all cops is
+    not cached, the offenses of the fast check get marked first and the
+    check of all cops follows at a lower priority."""
+    fast_options = RubocopConfig.for_view(view).fast_check_options()
+    if not job or not fast_options or \
+        self.run_rubocop(view, content, cached_only=True) is not None:
+      self.mark_tier(view, content, job, change_count)
+      return
+    if not self.mark_tier(view, content, job, change_count, fast_options):
+      return
+    self.scheduler().follow(job,
+      lambda job: self.mark_tier(view, content, job, change_count), -1)
+
+  def mark_tier(self, view, content, job, change_count, cop_options=[]):
+    """Checks view with the given cops (all by default) and marks the
+    offenses in all views of its buffer. Returns False if the check got
+    superseded."""
+    path = view.file_name()
+    stats = RunStats.start(path + ' (fast)' if cop_options else path)
+    results = self.run_rubocop(view, content, job, stats, cop_options)
+    # Drop the results if the buffer was modified in the meantime
+    if results is None or \
+        (change_count is not None and view.change_count() != change_count):
+      return False
+    self.set_marks_for_views(self.buffer_views(view), results, stats,
+      bool(cop_options))
+    self.record_stats(stats)
+    return True
+
+  def is_excluded(self, view):
+    """True if rubocop is known to exclude the file of view, so there is
+    no need to run it"""
+    path = view.file_name()
+    config = RubocopConfig.for_view(view)
+    if not path or not config.get('skip_excluded_files') or config.get('rubocop_disable'):
+      return False
+    root = config.project_root()
+    if not root:
+      return False
+    runner = config.create_runner(resolve=False)
+    return TargetFiles.instance().lookup(runner, root, path) is False
+
+  def learn_target(self, config, path, results):
+    # rubocop lists every file it inspected, even without offenses
+    root = config.project_root()
+    if root and config.get('skip_excluded_files'):
+      TargetFiles.instance().learn(root, path, normalize_path(path) in results)
 
   def do_in_file_check(self, view):
     if not FileTools.is_ruby_file(view):
       return
-    mark = sublime.load_settings(SETTINGS_FILE).get('mark_issues_in_view')
-    self.mark_issues(view, mark)
+    mark = RubocopConfig.for_view(view).get('mark_issues_in_view')
+    if mark and self.is_excluded(view):
+      # Same outcome as a run with --force-exclusion
+      self.set_marks_for_views(self.buffer_views(view), [])
+      return
+    if sublime.version() < '3000':
+      self.mark_issues(view, mark)
+      return
+    self.schedule(view, lambda job: self.mark_issues(view, mark, job),
+      view.change_count())
+
+  def buffer_views(self, view):
+    """Returns all views showing the buffer of view (split panes and
+    views in other windows)"""
+    views = []
+    for wnd in sublime.windows():
+      for vw in wnd.views():
+        if vw.buffer_id() == view.buffer_id():
+          views.append(vw)
+    if not [vw for vw in views if vw.id() == view.id()]:
+      views.append(view)
+    return views
+
+  def scheduler(self):
+    scheduler = RubocopScheduler.instance()
+    scheduler.configure(RubocopConfig.for_package().get('max_concurrent_checks'))
+    return scheduler
+
+  def schedule(self, view, func, change_count=None):
+    # Only the latest check of a buffer matters, so a new check replaces
+    # the pending one of the same buffer. Checks of the same change count
+    # share a single run though, whichever view requested them. The
+    # active view goes first.
+    priority = 0
+    window = sublime.active_window()
+    active_view = window and window.active_view()
+    if active_view and active_view.buffer_id() == view.buffer_id():
+      priority = 1
+    self.scheduler().submit(('buffer', view.buffer_id()), func, priority,
+      change_count)
 
   def on_post_save(self, view):
     if sublime.version() >= '3000':
@@ -140,15 +535,71 @@ class RubocopEventListener(sublime_plugin.EventListener):
   def on_load_async(self, view):
     self.do_in_file_check(view)
 
+  def on_activated_async(self, view):
+    # Background tab which was not checked since the plugin got loaded
+    if self.unchecked_views.pop(view.id(), None):
+      self.do_in_file_check(view)
+    self.prewarm_cache(view)
+
+  def prewarm_cache(self, view):
+    # The first Ruby file activated in a project starts the prewarming
+    if not view.file_name() or not FileTools.is_ruby_file(view):
+      return
+    config = RubocopConfig.for_view(view)
+    if config.get('rubocop_disable') or not config.get('prewarm_rubocop_cache'):
+      return
+    if not config.rubocop_cache_root():
+      return
+    CachePrewarmer.instance().start(config.create_runner(resolve=False),
+      config.project_root())
+
+  def on_close(self, view):
+    RubocopConfig.invalidate(view.id())
+    self.unchecked_views.pop(view.id(), None)
+    self.marks.forget(view)
+
+  def on_modified(self, view):
+    self.marks.mark_dirty(view)
+
+  def on_modified_async(self, view):
+    if not view.file_name() or not FileTools.is_ruby_file(view):
+      return
+    config = RubocopConfig.for_view(view)
+    if not (config.get('mark_issues_in_view') and config.get('check_while_typing')):
+      return
+    change_count = view.change_count()
+    delay = config.get('check_while_typing_delay', 0)
+    sublime.set_timeout_async(
+      lambda: self.schedule_buffer_check(view, change_count),
+      delay
+    )
+
+  def schedule_buffer_check(self, view, change_count):
+    # Only the last modification of an edit burst triggers a check
+    if view.change_count() != change_count or self.is_excluded(view):
+      return
+    self.schedule(view, lambda job: self.check_buffer(view, change_count, job),
+      change_count)
+
+  def check_buffer(self, view, change_count, job=None):
+    if view.change_count() != change_count:
+      return
+    content = view.substr(sublime.Region(0, view.size()))
+    self.check_in_tiers(view, content, job, change_count)
+
   def on_selection_modified(self, view):
     curr_sel = view.sel()
     if curr_sel:
-      view_dict = self.get_current_file_dict(view)
-      if not view_dict:
+      index = self.get_offense_index(view)
+      if not index:
         return
       first_sel = curr_sel[0]
-      row, col = view.rowcol(first_sel.begin())
-      if row in view_dict.keys():
-        view.set_status('rubocop', 'RuboCop: {0}'.format(view_dict[row]))
+      offenses = index.at(first_sel.begin())
+      if not offenses:
+        line = view.line(first_sel.begin())
+        offenses = index.overlapping(line.begin(), line.end())
+      if offenses:
+        messages = [offense.message for offense in offenses]
+        view.set_status('rubocop', 'RuboCop: {0}'.format(' | '.join(messages)))
       else:
         view.set_status('rubocop', '')
@@ -0,0 +1,223 @@
+import sublime
+import bisect
+import threading
+
+if sublime.version() >= '3000':
+  from RuboCop.constants import *
+  from RuboCop.rubocop_offense_index import OffenseIndex
+else:
+  from constants import *
+  from rubocop_offense_index import OffenseIndex
+
+# Number of offenses drawn at once when marking huge files
+CHUNK_SIZE = 1000
+# Status bar key of the summary shown instead of the marks
+SUMMARY_KEY = 'rubocop_summary'
+# Severities without regions of their own
+SEVERITY_GROUPS = {
+  'info': 'convention',
+  'refactor': 'convention'
+}
+
+class MarkRenderer(object):
+  """Draws the offense regions of views and keeps their offense indexes.
+  Regions are kept per severity and per chunk of offenses and only the
+  region sets which actually changed get drawn again. Huge result sets are
+  drawn chunk by chunk, starting with the visible part of the view, and
+  above a limit only a summary is shown."""
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.indexes = {}
+    # view id -> {region key: (scope, icon)}
+    self.drawn = {}
+    self.generations = {}
+
+  def index(self, view):
+    index = self.indexes.get(view.id())
+    if index and index.dirty:
+      # Sublime moved the regions along with the edits in the meantime
+      regions = index.regions()
+      for key, positions in list(index.region_keys):
+        for pos, region in zip(positions, view.get_regions(key)):
+          regions[pos] = (region.begin(), region.end())
+      index.shift(regions)
+    return index
+
+  def mark_dirty(self, view):
+    index = self.indexes.get(view.id())
+    if index:
+      index.dirty = True
+
+  def clear(self, view):
+    self.next_generation(view)
+    self.indexes.pop(view.id(), None)
+    self.erase(view, set())
+    view.erase_status(SUMMARY_KEY)
+
+  def forget(self, view):
+    view_id = view.id()
+    with self.lock:
+      self.indexes.pop(view_id, None)
+      self.drawn.pop(view_id, None)
+      self.generations.pop(view_id, None)
+
+  def next_generation(self, view):
+    # Pending chunks of an earlier rendering stop as soon as they notice
+    # that the view got marked or cleared again.
+    with self.lock:
+      generation = self.generations.get(view.id(), 0) + 1
+      self.generations[view.id()] = generation
+    return generation
+
+  def render_offenses(self, view, offenses, styles, limit=0):
+    """Replaces the marks of view by offenses. Their positions in the
+    view are computed chunk by chunk like the regions get drawn, and not
+    at all if there are more than limit offenses."""
+    if limit and len(offenses) > limit:
+      self.summarize(view, len(offenses))
+      return
+    generation = self.next_generation(view)
+    change_count = view.change_count()
+    entries = []
+
+    def locate(start):
+      if self.generations.get(view.id()) != generation:
+        return
+      if view.change_count() != change_count:
+        # The positions are outdated, the next check marks the view again
+        return
+      for offense in offenses[start:start + CHUNK_SIZE]:
+        begin = view.text_point(offense.line - 1, offense.column - 1)
+        entries.append((begin, begin + offense.length, offense))
+      if start + CHUNK_SIZE < len(offenses):
+        return start + CHUNK_SIZE
+      self.render(view, OffenseIndex(entries), styles)
+
+    if sublime.version() < '3000':
+      start = 0
+      while start is not None:
+        start = locate(start)
+    else:
+      def locate_async(start):
+        start = locate(start)
+        if start is not None:
+          sublime.set_timeout_async(lambda: locate_async(start), 0)
+      locate_async(0)
+
+  def summarize(self, view, count):
+    """Shows the number of offenses instead of marking them"""
+    self.next_generation(view)
+    self.indexes[view.id()] = OffenseIndex([])
+    self.erase(view, set())
+    view.set_status(SUMMARY_KEY,
+      'RuboCop: {0} offenses, too many to mark'.format(count))
+
+  def render(self, view, index, styles, limit=0):
+    """Replaces the marks of view by the offenses of index. styles maps
+    the severities to the (scope, icon) of their regions."""
+    if limit and len(index) > limit:
+      self.summarize(view, len(index))
+      return
+    generation = self.next_generation(view)
+    index.region_keys = []
+    self.indexes[view.id()] = index
+    view.erase_status(SUMMARY_KEY)
+
+    chunks = self.chunks(view, index)
+    change_count = view.change_count()
+
+    def draw(number):
+      if self.generations.get(view.id()) != generation:
+        return
+      if view.change_count() != change_count:
+        # The positions are outdated, the next check draws them again
+        self.erase(view, self.drawn_keys(index))
+        return
+      chunk, positions = chunks[number]
+      for severity, severity_positions in self.by_severity(index, positions):
+        key = '{0}_{1}_{2}'.format(REGIONS_ID, severity, chunk)
+        regions = [
+          sublime.Region(index.begins[pos], index.ends[pos])
+          for pos in severity_positions
+        ]
+        self.draw_regions(view, key, regions, styles[severity])
+        index.region_keys.append((key, severity_positions))
+      if number + 1 < len(chunks):
+        return number + 1
+      self.erase(view, self.drawn_keys(index))
+
+    if not chunks:
+      self.erase(view, set())
+    elif sublime.version() < '3000':
+      number = 0
+      while number is not None:
+        number = draw(number)
+    else:
+      def draw_async(number):
+        number = draw(number)
+        if number is not None:
+          sublime.set_timeout_async(lambda: draw_async(number), 0)
+      draw_async(0)
+
+  def draw_regions(self, view, key, regions, style):
+    with self.lock:
+      drawn = self.drawn.setdefault(view.id(), {})
+      unchanged = drawn.get(key) == style
+      drawn[key] = style
+    if unchanged and self.same_regions(view.get_regions(key), regions):
+      return
+    scope, icon = style
+    view.add_regions(key, regions, scope, icon, REGIONS_OPTIONS_BITS)
+
+  def same_regions(self, current, regions):
+    if len(current) != len(regions):
+      return False
+    for a, b in zip(current, regions):
+      if a.begin() != b.begin() or a.end() != b.end():
+        return False
+    return True
+
+  def drawn_keys(self, index):
+    return set(key for key, positions in index.region_keys)
+
+  def chunks(self, view, index):
+    """Splits the positions of index into numbered chunks. The numbers
+    only depend on the positions, which keeps the region keys stable
+    between runs. The chunks of the visible region come first followed by
+    the ones below and above them."""
+    chunks = [
+      (start // CHUNK_SIZE, list(range(start, min(start + CHUNK_SIZE, len(index)))))
+      for start in range(0, len(index), CHUNK_SIZE)
+    ]
+    if len(chunks) < 2:
+      return chunks
+    visible = view.visible_region()
+    first = bisect.bisect_left(index.begins, visible.begin()) // CHUNK_SIZE
+    last = bisect.bisect_right(index.begins, visible.end()) // CHUNK_SIZE
+    first = min(first, len(chunks) - 1)
+    last = min(max(last, first), len(chunks) - 1)
+    return chunks[first:last + 1] + chunks[last + 1:] + list(reversed(chunks[:first]))
+
+  def by_severity(self, index, positions):
+    groups = dict((severity, []) for severity in MARK_SEVERITIES)
+    for pos in positions:
+      severity = index.offenses[pos].severity
+      severity = SEVERITY_GROUPS.get(severity, severity)
+      groups.get(severity, groups['convention']).append(pos)
+    return [
+      (severity, groups[severity]) for severity in MARK_SEVERITIES
+      if groups[severity]
+    ]
+
+  def erase(self, view, keep):
+    """Erases all regions drawn into view except for the keys in keep"""
+    with self.lock:
+      drawn = self.drawn.get(view.id(), {})
+      erased = [key for key in drawn if not key in keep]
+      for key in erased:
+        del drawn[key]
+    for key in erased:
+      view.erase_regions(key)
+    if not keep:
+      # Marks drawn by earlier versions of the plugin
+      view.erase_regions(REGIONS_ID)
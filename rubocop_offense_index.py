@@ -0,0 +1,56 @@
+import bisect
+
+class OffenseIndex(object):
+  """Offenses of a view sorted by the begin of their region. Answers which
+  offenses overlap a position or range by binary search, keeping all
+  offenses of a line instead of only the last one."""
+  def __init__(self, entries):
+    # entries: (begin, end, offense) tuples
+    entries = sorted(entries, key=lambda entry: (entry[0], entry[1]))
+    self.begins = [entry[0] for entry in entries]
+    self.ends = [entry[1] for entry in entries]
+    self.offenses = [entry[2] for entry in entries]
+    self.dirty = False
+    # (region key, positions) of the regions drawn for the offenses
+    self.region_keys = []
+    self.update_max_ends()
+
+  def __len__(self):
+    return len(self.offenses)
+
+  def update_max_ends(self):
+    # max_ends[i] is the largest end of the first i + 1 regions, which
+    # lets overlapping() stop scanning as early as possible.
+    self.max_ends = []
+    current = -1
+    for end in self.ends:
+      current = max(current, end)
+      self.max_ends.append(current)
+
+  def regions(self):
+    return list(zip(self.begins, self.ends))
+
+  def at(self, pos):
+    return self.overlapping(pos, pos)
+
+  def overlapping(self, begin, end):
+    """Returns the offenses whose region intersects [begin, end]"""
+    i = bisect.bisect_right(self.begins, end) - 1
+    result = []
+    while i >= 0 and self.max_ends[i] >= begin:
+      if self.ends[i] >= begin:
+        result.append(self.offenses[i])
+      i -= 1
+    result.reverse()
+    return result
+
+  def shift(self, regions):
+    """Takes over the positions of regions after the buffer got modified.
+    regions have to be in the same order as returned by regions()."""
+    if len(regions) != len(self.offenses):
+      return False
+    self.begins = [region[0] for region in regions]
+    self.ends = [region[1] for region in regions]
+    self.update_max_ends()
+    self.dirty = False
+    return True
@@ -0,0 +1,297 @@
+import sublime
+import threading
+import time
+import multiprocessing
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
+
+if sublime.version() >= '3000':
+  from RuboCop.rubocop_results import parse_json, normalize_path, format_emacs
+  from RuboCop.rubocop_environment import EnvironmentResolver
+  from RuboCop.file_tools import FileTools
+else:
+  from rubocop_results import parse_json, normalize_path, format_emacs
+  from rubocop_environment import EnvironmentResolver
+  from file_tools import FileTools
+
+# Seconds to collect output lines of a shard before handing them over
+FLUSH_INTERVAL = 0.25
+# Upper limit of files passed to a single rubocop process
+MAX_SHARD_SIZE = 500
+# Commands run through cmd.exe on Windows, which takes at most 8191
+# characters. Some room is left for quoting.
+MAX_WINDOWS_COMMAND_LENGTH = 7500
+
+def default_process_count():
+  try:
+    return multiprocessing.cpu_count()
+  except NotImplementedError:
+    return 1
+
+def command_chunks(runner, options, paths):
+  """Splits paths into parts whose command lines fit into cmd.exe, which
+  runs all commands on Windows. Elsewhere paths stay in one part."""
+  if not runner.on_windows:
+    return [paths]
+  length = len(runner.command_string([], options))
+  parts = [[]]
+  used = length
+  for path in paths:
+    # Paths get quoted and separated by a space
+    size = len(path) + 3
+    if parts[-1] and used + size > MAX_WINDOWS_COMMAND_LENGTH:
+      parts.append([])
+      used = length
+    parts[-1].append(path)
+    used += size
+  return parts
+
+def merge_results(root_results):
+  """Merges the offenses of (root, results, checked, elapsed) tuples"""
+  merged = OrderedDict()
+  for root, results, checked, elapsed in root_results:
+    merged.update(results)
+  return merged
+
+class RootResults(object):
+  """Collects the results of checks of several project roots running at
+  the same time. on_finished gets called once the last root finished,
+  with (root, results, checked, elapsed) tuples in the order of roots."""
+  def __init__(self, roots, on_finished):
+    self.roots = roots
+    self.on_finished = on_finished
+    self.lock = threading.Lock()
+    self.results = {}
+
+  def add(self, root, results, checked, elapsed):
+    with self.lock:
+      self.results[root] = (root, results, checked, elapsed)
+      if len(self.results) < len(self.roots):
+        return
+      root_results = [self.results[r] for r in self.roots]
+    self.on_finished(root_results)
+
+class ParallelCheck(object):
+  """Splits the target files of the given paths into shards and checks
+  them with several rubocop processes at once. on_output gets called
+  with the output lines of the shards as they arrive, on_finished once
+  with the number of inspected files and the elapsed wall time."""
+  def __init__(self, runner, pathlist, options, processes, on_output,
+      on_finished):
+    self.runner = runner
+    self.pathlist = pathlist
+    self.options = options
+    self.processes = processes or default_process_count()
+    self.on_output = on_output
+    self.on_finished = on_finished
+    self.lock = threading.Lock()
+    self.shards = []
+    self.runners = []
+    self.cancelled = False
+    # Path -> (mtime, size) of the inspected files when rubocop read them
+    self.states = {}
+    # Distinct error messages of failed rubocop runs
+    self.errors = []
+
+  def start(self):
+    thread = threading.Thread(target=self.run)
+    thread.daemon = True
+    thread.start()
+
+  def cancel(self):
+    with self.lock:
+      self.cancelled = True
+      self.shards = []
+      runners = list(self.runners)
+    for runner in runners:
+      runner.cancel()
+
+  def run(self):
+    started = time.time()
+    if self.runner.resolve_environment:
+      EnvironmentResolver.instance().apply(self.runner, self.runner.chdir)
+    lister = self.runner.clone()
+    with self.lock:
+      self.runners.append(lister)
+    try:
+      files = lister.target_files(self.pathlist)
+      if not files and not lister.succeeded() and not lister.cancelled:
+        self.fail(lister.error_message())
+    except OSError as e:
+      # e.g. rubocop is not installed
+      self.fail(str(e))
+      files = []
+    with self.lock:
+      if self.cancelled:
+        return
+      self.shards = self.split(self.select(files))
+
+    workers = []
+    for i in range(min(self.processes, len(self.shards))):
+      worker = threading.Thread(target=self.work)
+      worker.daemon = True
+      worker.start()
+      workers.append(worker)
+    for worker in workers:
+      worker.join()
+
+    if not self.cancelled:
+      self.finish(files, time.time() - started)
+
+  def select(self, files):
+    return files
+
+  def finish(self, files, elapsed):
+    self.on_finished(len(files), elapsed)
+
+  def split(self, files):
+    count = max(self.processes, (len(files) + MAX_SHARD_SIZE - 1) // MAX_SHARD_SIZE)
+    # Distribute files round robin, so large folders get spread over
+    # all shards instead of ending up in a single one.
+    shards = [files[i::count] for i in range(count)]
+    return [
+      part for shard in shards if shard
+      for part in command_chunks(self.runner, self.options, shard)
+    ]
+
+  def next_shard(self):
+    with self.lock:
+      if self.cancelled or not self.shards:
+        return None, None
+      runner = self.runner.clone()
+      self.runners.append(runner)
+      return self.shards.pop(0), runner
+
+  def work(self):
+    while True:
+      shard, runner = self.next_shard()
+      if shard is None:
+        return
+      try:
+        self.check_shard(shard, runner)
+      except OSError as e:
+        self.fail(str(e))
+        continue
+      if not runner.succeeded() and not runner.cancelled:
+        self.fail(runner.error_message())
+
+  def fail(self, message):
+    # A broken config fails every shard the same way
+    with self.lock:
+      if not message in self.errors:
+        self.errors.append(message)
+
+  def check_shard(self, shard, runner):
+    lines = []
+    flushed = time.time()
+    for line in runner.stream(shard, self.options):
+      lines.append(line)
+      if time.time() - flushed >= FLUSH_INTERVAL:
+        self.flush(runner, lines)
+        lines = []
+        flushed = time.time()
+    self.flush(runner, lines)
+
+  def observe(self, paths):
+    """Returns the states of paths before rubocop inspects them, so
+    results of files changed in the meantime can be told apart"""
+    return dict((normalize_path(path), FileTools.file_state(path)) for path in paths)
+
+  def flush(self, runner, lines):
+    if lines and not runner.cancelled:
+      self.on_output(lines)
+
+class CollectingCheck(ParallelCheck):
+  """Parallel check which runs the json formatter. on_output gets the
+  offenses as emacs formatted lines, while the offenses of all files of
+  successful shards are collected in results (path -> offenses). options
+  have to request the json formatter."""
+  def __init__(self, runner, pathlist, options, processes, on_output,
+      on_finished):
+    super(CollectingCheck, self).__init__(runner, pathlist, options,
+      processes, on_output, on_finished)
+    self.results = OrderedDict()
+
+  def check_shard(self, shard, runner):
+    states = self.observe(shard)
+    output = runner.run(shard, self.options)
+    if runner.cancelled:
+      return
+    results = parse_json(output, runner.chdir)
+    if results is None:
+      if runner.succeeded():
+        self.fail(runner.error_message())
+      return
+    lines = []
+    for path, offenses in results.items():
+      for offense in offenses:
+        lines.append(format_emacs(path, offense).encode('utf-8'))
+    if runner.succeeded():
+      with self.lock:
+        self.states.update(states)
+        for path in shard:
+          self.results[normalize_path(path)] = results.get(normalize_path(path), [])
+    self.flush(runner, lines)
+
+class IncrementalCheck(ParallelCheck):
+  """Parallel check which only passes files to rubocop which changed
+  since the last run according to the given FileIndex. Results of all
+  other files are taken from the index. options have to request the
+  json formatter. on_finished gets called with the offenses of all
+  target files, the number of files which had to be checked and the
+  elapsed wall time."""
+  def __init__(self, runner, pathlist, options, processes, index,
+      on_finished):
+    super(IncrementalCheck, self).__init__(runner, pathlist, options,
+      processes, None, on_finished)
+    self.index = index
+    self.command = ' '.join(runner.command_list([], options))
+    self.results = {}
+    self.checked = 0
+
+  def config_fingerprint(self, path):
+    return self.index.config_fingerprint(
+      path, self.command, self.runner.rubocop_config_path)
+
+  def select(self, files):
+    # The index is stored, so it has to tell rubocop versions apart
+    self.command += '\x00' + self.runner.version()
+    stale = []
+    for path in files:
+      offenses = self.index.lookup(path, self.config_fingerprint(path))
+      if offenses is None:
+        stale.append(path)
+      else:
+        self.results[normalize_path(path)] = offenses
+        self.states.update(self.observe([path]))
+    self.checked = len(stale)
+    return stale
+
+  def check_shard(self, shard, runner):
+    states = self.observe(shard)
+    output = runner.run(shard, self.options)
+    if runner.cancelled or not runner.succeeded():
+      return
+    results = parse_json(output, runner.chdir)
+    if results is None:
+      self.fail(runner.error_message())
+      return
+    with self.lock:
+      self.states.update(states)
+      for path in shard:
+        offenses = results.get(normalize_path(path), [])
+        self.results[normalize_path(path)] = offenses
+        self.index.update(path, offenses, self.config_fingerprint(path))
+
+  def finish(self, files, elapsed):
+    self.index.retain(files)
+    self.index.save()
+    results = OrderedDict()
+    for path in files:
+      path = normalize_path(path)
+      if path in self.results:
+        results[path] = self.results[path]
+    self.on_finished(results, self.checked, elapsed)
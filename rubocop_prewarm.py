@@ -0,0 +1,65 @@
+import sublime
+import threading
+
+if sublime.version() >= '3000':
+  from RuboCop.rubocop_environment import EnvironmentResolver
+else:
+  from rubocop_environment import EnvironmentResolver
+
+class CachePrewarmer(object):
+  """Inspects whole projects once in the background at a reduced process
+  priority to fill rubocop's result cache (see --cache-root), so the
+  first checks after opening a project are fast. Each project root gets
+  prewarmed once per session."""
+  prewarmer_instance = None
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.roots = set()
+    self.runners = {}
+
+  @classmethod
+  def instance(cls):
+    if cls.prewarmer_instance is None:
+      cls.prewarmer_instance = cls()
+    return cls.prewarmer_instance
+
+  def start(self, runner, root):
+    with self.lock:
+      if root in self.roots:
+        return False
+      self.roots.add(root)
+      runner.low_priority = True
+      runner.chdir = root
+      self.runners[root] = runner
+    thread = threading.Thread(target=lambda: self.prewarm(runner, root))
+    thread.daemon = True
+    thread.start()
+    return True
+
+  def prewarm(self, runner, root):
+    try:
+      if runner.resolve_environment:
+        EnvironmentResolver.instance().apply(runner, root)
+      # Only the cache matters, so keep the output as small as possible
+      runner.run([root], ['--format', 'files', '--force-exclusion'])
+    finally:
+      with self.lock:
+        if self.runners.get(root) is runner:
+          del self.runners[root]
+    if not runner.cancelled:
+      sublime.status_message('RuboCop: Cache of {0} is ready.'.format(root))
+
+  def running(self):
+    with self.lock:
+      return list(self.runners.keys())
+
+  def cancel(self, root=None):
+    with self.lock:
+      if root is None:
+        runners = list(self.runners.values())
+      else:
+        runners = [self.runners.get(root)]
+    for runner in runners:
+      if runner:
+        runner.cancel()
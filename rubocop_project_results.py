@@ -0,0 +1,83 @@
+import os
+import threading
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
+
+# Groupings offered by the offense summary: (caption, name)
+GROUPINGS = [
+  ('By cop', 'cop'),
+  ('By severity', 'severity'),
+  ('By directory', 'directory'),
+  ('By file', 'file')
+]
+
+class ProjectResults(object):
+  """Offenses of all files of the checked project folders, kept in memory
+  so summaries need no further rubocop run. The offenses of single files
+  get replaced whenever an in-view check inspects them again."""
+  results_instance = None
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.roots = OrderedDict()
+
+  @classmethod
+  def instance(cls):
+    if cls.results_instance is None:
+      cls.results_instance = cls()
+    return cls.results_instance
+
+  def load(self, root, results):
+    """Replaces the results of root by the ones of a complete run"""
+    with self.lock:
+      self.roots[os.path.abspath(root)] = OrderedDict(results)
+
+  def update(self, path, offenses):
+    path = os.path.abspath(path)
+    with self.lock:
+      for root, files in self.roots.items():
+        if path.startswith(os.path.join(root, '')):
+          files[path] = offenses
+
+  def results(self, root):
+    """Returns the offenses of all files of root or None if root was not
+    checked yet"""
+    with self.lock:
+      files = self.roots.get(os.path.abspath(root))
+      if files is None:
+        return None
+      return OrderedDict(files)
+
+  @staticmethod
+  def display_path(path, roots):
+    """Path relative to its root, prefixed by the name of the root if
+    there are several of them"""
+    for root in roots:
+      if path.startswith(os.path.join(root, '')):
+        relative_path = os.path.relpath(path, root)
+        if len(roots) > 1:
+          relative_path = os.path.join(os.path.basename(root), relative_path)
+        return relative_path
+    return path
+
+  @staticmethod
+  def group(results, roots, grouping):
+    """Groups the offenses of results and returns (name, [(path,
+    offense)]) tuples, the largest group first"""
+    groups = {}
+    for path, offenses in results.items():
+      relative_path = ProjectResults.display_path(path, roots)
+      for offense in offenses:
+        if grouping == 'cop':
+          name = offense.cop_name
+        elif grouping == 'severity':
+          name = offense.severity
+        elif grouping == 'directory':
+          name = os.path.dirname(relative_path) or '.'
+        else:
+          name = relative_path
+        groups.setdefault(name, []).append((path, offense))
+    return sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
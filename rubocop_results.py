@@ -0,0 +1,128 @@
+import os
+import re
+import json
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
+
+SEVERITIES = ['info', 'refactor', 'convention', 'warning', 'error', 'fatal']
+SEVERITY_CODES = dict((severity[:1].upper(), severity) for severity in SEVERITIES)
+# path:line:column: C: [Correctable] Cop/Name: message
+EMACS_LINE = re.compile(r'^(.*):(\d+):(\d+): ([A-Z]): (?:\[(\w+)\] )?(.*)$')
+
+class Offense(object):
+  """A single offense as reported by rubocop's json formatter.
+  Lines and columns are 1-based like in rubocop's output."""
+  __slots__ = (
+    'line', 'column', 'length', 'severity', 'cop_name', 'message',
+    'correctable'
+  )
+
+  def __init__(self, line, column, length, severity, cop_name, message,
+      correctable):
+    self.line = line
+    self.column = column
+    self.length = length
+    self.severity = severity
+    self.cop_name = cop_name
+    self.message = message
+    self.correctable = correctable
+
+  @classmethod
+  def from_json(cls, data):
+    location = data.get('location') or {}
+    return cls(
+      location.get('start_line', location.get('line', 1)),
+      location.get('start_column', location.get('column', 1)),
+      location.get('length', 0),
+      data.get('severity', 'convention'),
+      data.get('cop_name', ''),
+      data.get('message', ''),
+      bool(data.get('correctable'))
+    )
+
+  def to_list(self):
+    return [
+      self.line, self.column, self.length, self.severity, self.cop_name,
+      self.message, self.correctable
+    ]
+
+def parse_json(output, base_dir=None):
+  """Parses the output of rubocop --format json and returns an ordered
+  mapping of absolute file paths to their offenses. Relative paths are
+  resolved against base_dir (the working directory of the run). Returns
+  None if output holds no report, e.g. because rubocop failed to load."""
+  if not output:
+    return None
+  if not isinstance(output, str):
+    output = output.decode('utf-8', 'replace')
+  # Version managers or bundler might print warnings before the report
+  start = output.find('{')
+  if start < 0:
+    return None
+  try:
+    report = json.loads(output[start:])
+  except ValueError:
+    return None
+  if not isinstance(report, dict) or not 'files' in report:
+    return None
+
+  base_dir = base_dir or os.getcwd()
+  results = OrderedDict()
+  for entry in report.get('files', []):
+    path = entry.get('path', '')
+    if not os.path.isabs(path):
+      path = os.path.join(base_dir, path)
+    # Offenses fixed by auto correction are gone from the source
+    results[normalize_path(path)] = [
+      Offense.from_json(offense) for offense in entry.get('offenses', [])
+      if not offense.get('corrected')
+    ]
+  return results
+
+def parse_emacs(output, source):
+  """Parses the report of rubocop --format emacs of a single file and
+  returns its offenses which were not corrected. The emacs formatter
+  tells no lengths, so the offenses reach to the end of their line in
+  source."""
+  if not isinstance(output, str):
+    output = output.decode('utf-8', 'replace')
+  lines = source.splitlines()
+  offenses = []
+  for line in output.splitlines():
+    match = EMACS_LINE.match(line)
+    if not match:
+      continue
+    row, column = int(match.group(2)), int(match.group(3))
+    tag, message = match.group(5), match.group(6)
+    if tag == 'Corrected':
+      continue
+    length = 0
+    if 0 < row <= len(lines):
+      length = max(len(lines[row - 1]) - column + 1, 0)
+    cop_name = message.split(': ', 1)[0] if ': ' in message else ''
+    offenses.append(Offense(row, column, length,
+      SEVERITY_CODES.get(match.group(4), 'convention'), cop_name, message,
+      tag == 'Correctable'))
+  return offenses
+
+def format_emacs(path, offense):
+  """Formats an offense like rubocop's emacs formatter does"""
+  return '{0}:{1}:{2}: {3}: {4}'.format(path, offense.line, offense.column,
+    offense.severity[:1].upper(), offense.message)
+
+def normalize_path(path):
+  return os.path.abspath(path)
+
+def encode_offenses(offenses):
+  """Compact representation used to store offenses inside the cache"""
+  data = [offense.to_list() for offense in offenses]
+  return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def decode_offenses(data):
+  try:
+    return [Offense(*values) for values in json.loads(data.decode('utf-8'))]
+  except (ValueError, TypeError):
+    return None
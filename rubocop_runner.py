@@ -1,22 +1,63 @@
 import os
 import subprocess
+import threading
+import time
 import shlex
 import locale
+import tempfile
 
 RVM_DEFAULT_PATH = '~/.rvm/bin/rvm-auto-ruby'
 RBENV_DEFAULT_PATH = '~/.rbenv/bin/rbenv'
+# Niceness of low priority processes on POSIX systems
+LOW_PRIORITY_NICENESS = 10
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
 
 class RubocopRunner(object):
   """This class takes care of the rubocop location and its execution"""
+  # rubocop --version per command, asked once per session
+  versions = {}
+  versions_lock = threading.Lock()
+
   def __init__(self, args):
     self.set_default_paths()
     self.on_windows = False
     self.is_st2 = False
     self.custom_rubocop_cmd = ''
     self.rubocop_config_file = ''
+    self.rubocop_config_path = ''
+    self.cache_root = None
+    self.low_priority = False
     self.chdir = None
+    self.server_mode = False
+    self.use_server = False
+    self.returncode = None
+    self.errors = b''
+    self.timeout = 0
+    self.timed_out = False
+    self.cancelled = False
+    self.process = None
+    self.spawn_time = 0.0
+    self.run_time = 0.0
+    self.output_size = 0
+    self.resolve_environment = False
+    self.resolved_command = None
+    self.env = None
     vars(self).update(args)
 
+  def clone(self):
+    """Returns a runner with the same configuration but a fresh
+    execution state"""
+    runner = RubocopRunner(vars(self))
+    runner.returncode = None
+    runner.errors = b''
+    runner.timed_out = False
+    runner.cancelled = False
+    runner.process = None
+    runner.spawn_time = 0.0
+    runner.run_time = 0.0
+    runner.output_size = 0
+    return runner
+
   def set_default_paths(self):
     self.rvm_auto_ruby_path = RVM_DEFAULT_PATH
     self.rbenv_path = RBENV_DEFAULT_PATH
@@ -40,26 +81,182 @@ class RubocopRunner(object):
       return True
     return False
 
-  def run(self, pathlist, options=[]):
+  def run(self, pathlist, options=[], input=None):
     call_list = self.command_list(pathlist, options)
+    return self.execute(call_list, input)
+
+  def target_files(self, pathlist):
+    """Returns the absolute paths of all files rubocop would inspect"""
+    output = self.run(pathlist, ['--list-target-files', '--force-exclusion'])
+    base_dir = self.chdir or os.getcwd()
+    files = []
+    for line in output.decode('utf-8', 'replace').splitlines():
+      line = line.strip()
+      if line:
+        files.append(os.path.join(base_dir, line))
+    return files
+
+  def version(self):
+    """Returns the version of rubocop, e.g. to tell results of different
+    versions apart. Empty if it could not be determined."""
+    call_list = self.server_command_list('--version')
+    key = (tuple(call_list), self.chdir, tuple(sorted((self.env or {}).items())))
+    with RubocopRunner.versions_lock:
+      if key in RubocopRunner.versions:
+        return RubocopRunner.versions[key]
+    probe = self.clone()
+    try:
+      output = probe.execute(call_list)
+    except OSError:
+      output = b''
+    version = ''
+    if probe.returncode == 0:
+      version = output.decode('utf-8', 'replace').strip()
+    with RubocopRunner.versions_lock:
+      RubocopRunner.versions[key] = version
+    return version
+
+  def run_server_command(self, option):
+    return self.execute(self.server_command_list(option))
+
+  def execute(self, call_list, input=None):
+    if self.cancelled:
+      return b''
+
+    stdin = None
+    if input is not None:
+      stdin = subprocess.PIPE
+
+    p = self.start_process(call_list, stdin, subprocess.PIPE)
+    timer = self.start_timer()
+    started = time.time()
+    try:
+      out, err = p.communicate(input)
+    finally:
+      self.stop_timer(timer)
+    self.run_time += time.time() - started
+    self.output_size += len(out)
+    self.returncode = p.returncode
+    self.errors = err or b''
+    return out
+
+  def stream(self, pathlist, options=[], input=None):
+    """Runs rubocop and yields its output line by line as soon as it
+    arrives. Call cancel() to stop the run early."""
+    if self.cancelled:
+      return
+
+    stdin = None
+    if input is not None:
+      stdin = subprocess.PIPE
+
+    # A file instead of a pipe, which could fill up while stdout is read
+    errors = tempfile.TemporaryFile()
+    p = self.start_process(self.command_list(pathlist, options), stdin, errors)
+    timer = self.start_timer()
+    try:
+      if input is not None:
+        writer = threading.Thread(target=self.write_input, args=(p, input))
+        writer.daemon = True
+        writer.start()
+      for line in iter(p.stdout.readline, b''):
+        yield line.rstrip(b'\r\n')
+      p.wait()
+      self.returncode = p.returncode
+      errors.seek(0)
+      self.errors = errors.read()
+    finally:
+      # Also reached if the consumer stops iterating early
+      self.kill()
+      self.stop_timer(timer)
+      p.stdout.close()
+      errors.close()
+
+  def write_input(self, p, input):
+    try:
+      p.stdin.write(input)
+      p.stdin.close()
+    except (IOError, OSError):
+      pass
+
+  def start_process(self, call_list, stdin, stderr):
     use_shell = False
     if self.on_windows:
       use_shell = True
 
-    p = subprocess.Popen(call_list, shell=use_shell,
-      stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.chdir)
-    out, err = p.communicate()
-    return out
+    env = None
+    if self.env:
+      env = dict(os.environ)
+      env.update(self.env)
+
+    priority = {}
+    if self.low_priority and self.on_windows:
+      priority['creationflags'] = BELOW_NORMAL_PRIORITY_CLASS
+    elif self.low_priority and hasattr(os, 'nice'):
+      priority['preexec_fn'] = lambda: os.nice(LOW_PRIORITY_NICENESS)
+
+    started = time.time()
+    p = subprocess.Popen(call_list, shell=use_shell, stdin=stdin,
+      stdout=subprocess.PIPE, stderr=stderr, cwd=self.chdir, env=env,
+      **priority)
+    self.spawn_time += time.time() - started
+    self.process = p
+    if self.cancelled:
+      self.kill()
+    return p
+
+  def start_timer(self):
+    if not self.timeout:
+      return None
+    timer = threading.Timer(self.timeout, self.kill_on_timeout)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+  def stop_timer(self, timer):
+    if timer:
+      timer.cancel()
+    self.process = None
+
+  def cancel(self):
+    self.cancelled = True
+    self.kill()
+
+  def kill_on_timeout(self):
+    self.timed_out = True
+    self.kill()
+
+  def kill(self):
+    p = self.process
+    if p and p.poll() is None:
+      try:
+        p.kill()
+      except OSError:
+        pass
+
+  def succeeded(self):
+    # rubocop exits with 1 if offenses were found and with 2 on errors
+    if self.cancelled or self.timed_out:
+      return False
+    return self.returncode in (0, 1)
+
+  def error_message(self):
+    """Describes why the last run did not succeed"""
+    if self.timed_out:
+      return 'rubocop timed out after {0} seconds'.format(self.timeout)
+    message = self.errors.decode('utf-8', 'replace').strip()
+    return message or 'rubocop exited with status {0}'.format(self.returncode)
 
   def command_string(self, pathlist, options=[]):
     list = self.command_list(pathlist, options)
     return ' '.join(list)
 
-  def command_list(self, pathlist, options=[]):
+  def base_command(self):
     result = []
-
-    # Command
-    if not self.custom_rubocop_cmd:
+    if not self.custom_rubocop_cmd and self.resolved_command:
+      # Ruby and rubocop executables resolved by EnvironmentResolver
+      result += self.resolved_command
+    elif not self.custom_rubocop_cmd:
       self.load_cmd_prefix()
       result += self.cmd_prefix
       result.append('rubocop')
@@ -68,6 +265,20 @@ class RubocopRunner(object):
         result += self.custom_rubocop_cmd.split()
       else:
         result += shlex.split(self.custom_rubocop_cmd)
+    return result
+
+  def server_command_list(self, option):
+    # Commands like --server-status or --stop-server talk to the
+    # resident RuboCop server and take neither paths nor a config.
+    return self.base_command() + [option]
+
+  def command_list(self, pathlist, options=[]):
+    result = []
+
+    # Command
+    result += self.base_command()
+    if self.use_server:
+      result.append('--server')
 
     # Options
     if options:
@@ -76,6 +287,9 @@ class RubocopRunner(object):
     if self.rubocop_config_file:
       result.append('-c')
       result.append(self.rubocop_config_file)
+    if self.cache_root:
+      result.append('--cache-root')
+      result.append(self.cache_root)
 
     # Paths
     for path in pathlist:
@@ -0,0 +1,147 @@
+import threading
+import traceback
+try:
+  from collections import OrderedDict
+except ImportError:
+  # Python 2.6 of Sublime Text 2
+  from rubocop_compat import OrderedDict
+
+class RubocopJob(object):
+  """A unit of work for the scheduler. The function of a job receives the
+  job itself, so it can attach the runner it uses and check whether it
+  got superseded in the meantime."""
+  def __init__(self, key, func, priority, version=None):
+    self.key = key
+    self.func = func
+    self.priority = priority
+    self.version = version
+    self.runner = None
+    self.cancelled = False
+
+  def attach(self, runner):
+    self.runner = runner
+    if self.cancelled:
+      runner.cancel()
+
+  def cancel(self):
+    self.cancelled = True
+    if self.runner:
+      self.runner.cancel()
+
+class RubocopScheduler(object):
+  """Runs rubocop jobs on a bounded number of worker threads. There is at
+  most one pending job per key (e.g. per buffer); submitting a new job for
+  a key drops the pending one and kills the process of a running one,
+  unless both jobs share the same version (e.g. the change count of a
+  buffer). Then the new job is dropped and the existing one is shared."""
+  scheduler_instance = None
+
+  def __init__(self, max_jobs=2):
+    self.lock = threading.Lock()
+    self.pending = OrderedDict()
+    self.running = {}
+    self.workers = 0
+    self.max_jobs = max_jobs
+
+  @classmethod
+  def instance(cls):
+    if cls.scheduler_instance is None:
+      cls.scheduler_instance = cls()
+    return cls.scheduler_instance
+
+  def configure(self, max_jobs):
+    with self.lock:
+      self.max_jobs = max(max_jobs or 1, 1)
+
+  def submit(self, key, func, priority=0, version=None):
+    job = RubocopJob(key, func, priority, version)
+    with self.lock:
+      shared = self.shared_job(key, version)
+      if shared:
+        shared.priority = max(shared.priority, priority)
+        return shared
+      superseded = self.pending.pop(key, None)
+      if superseded:
+        superseded.cancel()
+      running = self.running.get(key)
+      if running:
+        running.cancel()
+      self.pending[key] = job
+      self.start_worker()
+    return job
+
+  def follow(self, job, func, priority=0):
+    """Queues func as the successor of the running job, with the same
+    key and version, e.g. a slower check of the same buffer contents.
+    Newer submissions for the key supersede it like any other job.
+    Returns None if job got superseded already."""
+    follower = RubocopJob(job.key, func, priority, job.version)
+    with self.lock:
+      if job.cancelled or job.key in self.pending:
+        return None
+      self.pending[job.key] = follower
+      self.start_worker()
+    return follower
+
+  def cancel(self, key):
+    with self.lock:
+      jobs = [self.pending.pop(key, None), self.running.get(key)]
+    for job in jobs:
+      if job:
+        job.cancel()
+
+  def cancel_all(self):
+    with self.lock:
+      jobs = list(self.pending.values()) + list(self.running.values())
+      self.pending.clear()
+    for job in jobs:
+      job.cancel()
+
+  def idle(self):
+    with self.lock:
+      return not self.pending and not self.running
+
+  def start_worker(self):
+    if self.workers < self.max_jobs:
+      self.workers += 1
+      worker = threading.Thread(target=self.work)
+      worker.daemon = True
+      worker.start()
+
+  def shared_job(self, key, version):
+    if version is None:
+      return None
+    for job in [self.pending.get(key), self.running.get(key)]:
+      if job and not job.cancelled and job.version == version:
+        return job
+    return None
+
+  def next_job(self):
+    # Highest priority first, submission order among equal priorities.
+    # Keys which are still running are skipped until their run finished.
+    best = None
+    for key, job in self.pending.items():
+      if key in self.running:
+        continue
+      if best is None or job.priority > best.priority:
+        best = job
+    if best:
+      del self.pending[best.key]
+    return best
+
+  def work(self):
+    while True:
+      with self.lock:
+        job = self.next_job()
+        if job is None:
+          self.workers -= 1
+          return
+        self.running[job.key] = job
+      try:
+        if not job.cancelled:
+          job.func(job)
+      except Exception:
+        traceback.print_exc()
+      with self.lock:
+        if self.running.get(job.key) is job:
+          del self.running[job.key]
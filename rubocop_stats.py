@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Timings of a run, all in seconds
+TIMINGS = ['spawn', 'run', 'parse', 'render', 'total']
+
+class RunStats(object):
+  """Bounded ring buffer with the timings of the latest rubocop runs"""
+  stats_instance = None
+
+  def __init__(self, size=500):
+    self.lock = threading.Lock()
+    # deque.maxlen is missing on the Python 2.6 of Sublime Text 2
+    self.size = size
+    self.records = deque(maxlen=size)
+
+  @classmethod
+  def instance(cls):
+    if cls.stats_instance is None:
+      cls.stats_instance = cls()
+    return cls.stats_instance
+
+  def configure(self, size):
+    size = max(size or 0, 0)
+    with self.lock:
+      if size != self.size:
+        self.size = size
+        self.records = deque(self.records, size)
+
+  @staticmethod
+  def start(path):
+    return {
+      'path': path,
+      'started': time.time(),
+      'cached': False,
+      'spawn': 0.0,
+      'run': 0.0,
+      'bytes': 0,
+      'parse': 0.0,
+      'offenses': 0,
+      'render': 0.0
+    }
+
+  @staticmethod
+  def add_runner(record, runner):
+    record['spawn'] += runner.spawn_time
+    record['run'] += runner.run_time
+    record['bytes'] += runner.output_size
+
+  def record(self, record):
+    record['total'] = time.time() - record['started']
+    with self.lock:
+      if self.size:
+        self.records.append(record)
+
+  def snapshot(self):
+    with self.lock:
+      return list(self.records)
+
+  def clear(self):
+    with self.lock:
+      self.records.clear()
+
+  def report(self, slowest_count=10):
+    """Returns the lines of a human readable summary"""
+    records = self.snapshot()
+    if not records:
+      return ['No rubocop runs recorded yet.']
+
+    cached = len([r for r in records if r['cached']])
+    lines = [
+      '{0} runs recorded, {1} served from the cache.'.format(len(records), cached),
+      '',
+      '{0:<8} {1:>9} {2:>9} {3:>9} {4:>9}'.format('', 'p50', 'p90', 'p99', 'max')
+    ]
+    for name in TIMINGS:
+      values = sorted(r[name] for r in records)
+      lines.append('{0:<8} {1:>8.0f}ms {2:>7.0f}ms {3:>7.0f}ms {4:>7.0f}ms'.format(
+        name,
+        percentile(values, 50) * 1000,
+        percentile(values, 90) * 1000,
+        percentile(values, 99) * 1000,
+        values[-1] * 1000))
+    for name in ['bytes', 'offenses']:
+      values = sorted(r[name] for r in records)
+      lines.append('{0:<8} {1:>10} {2:>9} {3:>9} {4:>9}'.format(
+        name,
+        percentile(values, 50),
+        percentile(values, 90),
+        percentile(values, 99),
+        values[-1]))
+
+    lines.append('')
+    lines.append('Slowest files:')
+    slowest = sorted(records, key=lambda r: r['total'], reverse=True)
+    for r in slowest[:slowest_count]:
+      lines.append('{0:>8.0f}ms  {1} ({2} offenses)'.format(
+        r['total'] * 1000, r['path'], r['offenses']))
+    return lines
+
+  def dump(self, path):
+    with open(path, 'wb') as f:
+      f.write(json.dumps(self.snapshot(), indent=2).encode('utf-8'))
+
+def percentile(values, p):
+  """Nearest rank percentile of sorted values"""
+  if not values:
+    return 0
+  rank = int(round(p / 100.0 * (len(values) - 1)))
+  return values[rank]
@@ -0,0 +1,179 @@
+import sublime
+import os
+import threading
+import time
+
+if sublime.version() >= '3000':
+  from RuboCop.rubocop_cache import ResultCache
+  from RuboCop.rubocop_environment import EnvironmentResolver
+  from RuboCop.rubocop_results import normalize_path
+  from RuboCop.rubocop_parallel import command_chunks, MAX_SHARD_SIZE
+else:
+  from rubocop_cache import ResultCache
+  from rubocop_environment import EnvironmentResolver
+  from rubocop_results import normalize_path
+  from rubocop_parallel import command_chunks, MAX_SHARD_SIZE
+
+LIST_OPTIONS = ['--list-target-files', '--force-exclusion']
+# Files which might be shown with a Ruby syntax. Only those are remembered
+# as excluded, other files stay unknown and are simply checked.
+RUBY_EXTENSIONS = [
+  '.rb', '.rake', '.gemspec', '.ru', '.rbw', '.builder', '.jbuilder',
+  '.thor', '.podspec', '.arb', '.axlsx', '.cap'
+]
+# Folders rubocop excludes by default. Listing their files one by one
+# would take a lot of rubocop runs in projects with vendored gems.
+SKIPPED_FOLDERS = ['.git', 'node_modules', 'tmp', 'vendor']
+RUBY_FILE_NAMES = [
+  'Gemfile', 'Rakefile', 'Guardfile', 'Capfile', 'Vagrantfile', 'Podfile',
+  'Brewfile', 'Berksfile', 'Thorfile', 'gems.rb'
+]
+
+class ListingFailed(Exception):
+  pass
+
+class TargetFiles(object):
+  """Knows which files of a project rubocop inspects, so in-view checks of
+  excluded files (vendored gems, generated files, fixtures) need no
+  rubocop run at all. The target files of a project root get listed once
+  in the background and again whenever the command or the config files
+  of the root change. Files created later on are unknown until a regular
+  check tells whether rubocop inspects them."""
+  target_files_instance = None
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    # root -> (fingerprint, listed at, target files, excluded files)
+    self.roots = {}
+    # root -> fingerprint of the listing in progress
+    self.listing = {}
+
+  @classmethod
+  def instance(cls):
+    if cls.target_files_instance is None:
+      cls.target_files_instance = cls()
+    return cls.target_files_instance
+
+  @staticmethod
+  def fingerprint(runner, root):
+    parts = list(runner.command_list([root], LIST_OPTIONS))
+    try:
+      # .rubocop.yml and the files it usually inherits from
+      names = sorted(name for name in os.listdir(root)
+        if name.startswith('.rubocop') and name.endswith('.yml'))
+    except OSError:
+      names = []
+    configs = [runner.rubocop_config_path]
+    configs += [os.path.join(root, name) for name in names]
+    # A root without a config of its own uses the one of a parent folder
+    configs.append(ResultCache.nearest_config(os.path.join(root, 'Gemfile')))
+    # Includes the files the configs inherit from
+    parts += ResultCache.config_states(configs)
+    return '\x00'.join(parts)
+
+  @staticmethod
+  def is_ruby_path(name):
+    return name in RUBY_FILE_NAMES or os.path.splitext(name)[1] in RUBY_EXTENSIONS
+
+  def lookup(self, runner, root, path):
+    """Returns True if rubocop inspects path, False if it excludes it and
+    None if that is not known (yet). Starts listing the target files of
+    root with runner if there is no up to date list."""
+    root = os.path.abspath(root)
+    fingerprint = self.fingerprint(runner, root)
+    path = normalize_path(path)
+    nested_changed = self.nested_config_changed(path, root)
+    with self.lock:
+      entry = self.roots.get(root)
+      if entry and entry[0] == fingerprint:
+        # A config file in a subfolder might have changed the exclusions
+        if nested_changed > entry[1]:
+          return None
+        if path in entry[2]:
+          return True
+        if path in entry[3]:
+          return False
+        return None
+      if self.listing.get(root) == fingerprint:
+        return None
+      self.listing[root] = fingerprint
+    thread = threading.Thread(target=lambda: self.list(runner, root, fingerprint))
+    thread.daemon = True
+    thread.start()
+    return None
+
+  def nested_config_changed(self, path, root):
+    """Modification time of the config file of path if it lives in a
+    subfolder of root, 0 otherwise"""
+    nested = ResultCache.nearest_config(path)
+    if not nested or os.path.dirname(nested) == root:
+      return 0
+    try:
+      return os.path.getmtime(nested)
+    except OSError:
+      return 0
+
+  def learn(self, root, path, inspected):
+    """Remembers the outcome of a regular check of path"""
+    path = normalize_path(path)
+    with self.lock:
+      entry = self.roots.get(os.path.abspath(root))
+      if not entry:
+        return
+      if inspected:
+        entry[3].discard(path)
+        entry[2].add(path)
+      else:
+        entry[2].discard(path)
+        entry[3].add(path)
+
+  def list(self, runner, root, fingerprint):
+    listed_at = time.time()
+    runner.low_priority = True
+    runner.chdir = root
+    targets = set()
+    excluded = set()
+    try:
+      # Walk the project first, so files created while rubocop lists the
+      # targets can not end up as excluded ones
+      files = self.ruby_files(root)
+      if runner.resolve_environment:
+        EnvironmentResolver.instance().apply(runner, root)
+      targets = self.target_files(runner, [root])
+      # Listing a folder skips hidden folders and files which do not match
+      # AllCops/Include, while files passed explicitly (like the in-view
+      # checks do) are only dropped by the Exclude patterns. So the
+      # remaining files get listed explicitly as well.
+      remaining = sorted(files - targets)
+      for i in range(0, len(remaining), MAX_SHARD_SIZE):
+        batch = remaining[i:i + MAX_SHARD_SIZE]
+        for part in command_chunks(runner, LIST_OPTIONS, batch):
+          targets |= self.target_files(runner, part)
+      excluded = files - targets
+    except (OSError, ListingFailed):
+      targets = set()
+      excluded = set()
+    finally:
+      # A failed listing is kept as well, so it is not repeated on every
+      # save. All files stay unknown then.
+      with self.lock:
+        if self.listing.get(root) == fingerprint:
+          del self.listing[root]
+          self.roots[root] = (fingerprint, listed_at, targets, excluded)
+
+  def target_files(self, runner, pathlist):
+    listed = runner.target_files(pathlist)
+    if not runner.succeeded():
+      raise ListingFailed()
+    return set(normalize_path(path) for path in listed)
+
+  def ruby_files(self, root):
+    """Ruby files below root, leaving out the folders rubocop excludes by
+    default. Their files stay unknown until they get checked."""
+    files = set()
+    for folder, folders, names in os.walk(root):
+      folders[:] = [name for name in folders if not name in SKIPPED_FOLDERS]
+      for name in names:
+        if self.is_ruby_path(name):
+          files.add(normalize_path(os.path.join(folder, name)))
+    return files
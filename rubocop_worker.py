@@ -0,0 +1,122 @@
+import threading
+import time
+
+# Seconds between two health checks of the same server
+HEALTH_CHECK_INTERVAL = 60
+# Seconds between two sweeps for idle servers
+IDLE_CHECK_INTERVAL = 60
+
+class RubocopWorker(object):
+  """Keeps track of one resident RuboCop server (rubocop --server)
+  for a project root and config file"""
+  def __init__(self, runner):
+    # A runner of its own, the one of a check might get cancelled
+    self.runner = runner.clone()
+    self.lock = threading.Lock()
+    self.last_used = 0
+    self.last_health_check = 0
+    self.started = False
+    self.supported = True
+
+  def acquire(self):
+    """Makes sure the server is up before an inspection is sent to it.
+    Returns False if the installed RuboCop has no server mode."""
+    with self.lock:
+      now = time.time()
+      self.last_used = now
+      if not self.supported:
+        return False
+      if self.started and now - self.last_health_check < HEALTH_CHECK_INTERVAL:
+        return True
+      self.last_health_check = now
+      if not self.is_alive():
+        self.start()
+      return self.supported
+
+  def is_alive(self):
+    out = self.runner.run_server_command('--server-status')
+    return b'is running' in out
+
+  def start(self):
+    self.runner.run_server_command('--restart-server')
+    if self.runner.returncode != 0:
+      # RuboCop < 1.31 does not know about the server mode and reports
+      # the invalid option on stderr with exit code 2. Regular runs are
+      # used from now on, whatever made the start fail.
+      self.supported = False
+    self.started = self.supported
+
+  def stop(self):
+    with self.lock:
+      if self.started:
+        self.runner.run_server_command('--stop-server')
+      self.started = False
+
+  def idle_since(self):
+    return time.time() - self.last_used
+
+class RubocopWorkerPool(object):
+  """Hands out one RubocopWorker per project root, config file and
+  command and shuts workers down after they have been idle for a while"""
+  pool_instance = None
+
+  def __init__(self):
+    self.workers = {}
+    self.lock = threading.Lock()
+    self.idle_timeout = 0
+    self.timer = None
+
+  @classmethod
+  def instance(cls):
+    if cls.pool_instance is None:
+      cls.pool_instance = cls()
+    return cls.pool_instance
+
+  def key(self, runner):
+    return (
+      runner.chdir,
+      runner.rubocop_config_file,
+      tuple(runner.base_command())
+    )
+
+  def acquire(self, runner, idle_timeout):
+    """Returns True if runner may use the server mode for its next run"""
+    with self.lock:
+      self.idle_timeout = idle_timeout
+      key = self.key(runner)
+      worker = self.workers.get(key)
+      if worker is None:
+        worker = RubocopWorker(runner)
+        self.workers[key] = worker
+      self.schedule_idle_check()
+    return worker.acquire()
+
+  def schedule_idle_check(self):
+    if self.timer or not self.idle_timeout:
+      return
+    self.timer = threading.Timer(IDLE_CHECK_INTERVAL, self.stop_idle_workers)
+    self.timer.daemon = True
+    self.timer.start()
+
+  def stop_idle_workers(self):
+    idle = []
+    with self.lock:
+      self.timer = None
+      for key, worker in list(self.workers.items()):
+        if worker.idle_since() >= self.idle_timeout:
+          idle.append(worker)
+          del self.workers[key]
+      if self.workers:
+        self.schedule_idle_check()
+    for worker in idle:
+      worker.stop()
+
+  def shutdown(self):
+    with self.lock:
+      if self.timer:
+        self.timer.cancel()
+        self.timer = None
+      workers = list(self.workers.values())
+      self.workers.clear()
+    for worker in workers:
+      worker.stop()